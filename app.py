@@ -6,12 +6,11 @@ import tempfile
 from dotenv import load_dotenv
 from highlighter import find_highlight
 from llm_commentator import Commentator
-from video_processing.audio_on_video import overlay_audio_on_video
-from video_processing.subtitles import add_centered_subtitles
-from recalc_timestamps import extract_segments_by_move
+from video_processing.compose import AudioCue, SubtitleCue, compose_video
+from recalc_timestamps import extract_segments_by_move, load_timeline
 from tts import (
     setup_translation_models,
-    smart_translate,
+    translate_fanout,
     TTSEngine,
     setup_environment,
     create_output_dir
@@ -64,72 +63,38 @@ def process_files(video_path, pgn_path, json_path, mode, lang):
     print('Обрезаем видео')
     output_dir = '/'.join(video_path.split('/')[:-1])
     # start_ts, end_ts - от начала видео в секундах - таймкод начала момента и таймкод конца момента
-    start_ts, end_ts = extract_segments_by_move(json_path, video_path, f'{output_dir}/result.mp4', start, end)
+    timeline = load_timeline(json_path)
+    start_ts, end_ts = extract_segments_by_move(timeline, video_path, f'{output_dir}/result.mp4', start, end)
 
     # Переводим комментарии
     print('Переводи комментарии')
     if lang != 'ru':
-        comments = {
-            key: smart_translate(text, "ru", lang)
-            for key, text in comments.items()
-        }
+        comments = translate_fanout(comments, "ru", [lang])[0][lang]
 
     # Озвучиваем
     print('Делаем озвучку')
-    durations = {}
-    for key, text in comments.item():
-        out_path = os.path.join(output_dir, f'{key}.wav')
-        dur = tts.synthesize(text, lang, out_path)
-        durations[key] = dur
-
-    # Вставляем аудио в видео
+    keys = list(comments)
+    speech = dict(zip(keys, tts.synthesize_batch(
+        [(comments[key], lang, None) for key in keys],
+        return_audio=True
+    )))
+    durations = {key: audio.duration for key, audio in speech.items()}
+
+    # Накладываем озвучку и субтитры за один проход кодирования
     tmp_video_path = os.path.join(output_dir, f'tmp.mp4')
-    overlay_audio_on_video(
+    starts = {
+        'introduction': start_ts - durations['introduction'],
+        'interesting_moment': start_ts,
+        'conclusion': end_ts,
+    }
+    compose_video(
         video_path=f'{output_dir}/result.mp4',
-        audio_path=audio_path,
-        start_time_seconds=start_ts - durations['introduction'],
-        output_path=tmp_video_path
-    )
-    overlay_audio_on_video(
-        video_path=tmp_video_path,
-        audio_path=audio_path,
-        start_time_seconds=start_ts,
-        output_path=tmp_video_path
-    )
-    overlay_audio_on_video(
-        video_path=tmp_video_path,
-        audio_path=audio_path,
-        start_time_seconds=end_ts,
-        output_path=tmp_video_path
-    )
-
-    # Добавляем субтитры
-    _ = add_centered_subtitles(
-        video_path=tmp_video_path,
-        text=comments['introduction'],
-        y_position=500,
-        start_time=start_ts - durations['introduction'],
-        duration=durations['introduction'],
-        font_size=40,
-        output_path=tmp_video_path
-    )
-    _ = add_centered_subtitles(
-        video_path=tmp_video_path,
-        text=comments['interesting_moment'],
-        y_position=500,
-        start_time=start_ts,
-        duration=durations['interesting_moment'],
-        font_size=40,
-        output_path=tmp_video_path
-    )
-    _ = add_centered_subtitles(
-        video_path=tmp_video_path,
-        text=comments['conclusion'],
-        y_position=500,
-        start_time=end_ts,
-        duration=durations['conclusion'],
-        font_size=40,
-        output_path=tmp_video_path
+        output_path=tmp_video_path,
+        audio_cues=[AudioCue(speech[key], starts[key]) for key in starts],
+        subtitle_cues=[
+            SubtitleCue(comments[key], starts[key], durations[key], y_position=500, font_size=40)
+            for key in starts
+        ]
     )
 
     return tmp_video_path
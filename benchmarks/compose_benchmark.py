@@ -0,0 +1,87 @@
+"""
+Сравнение цепочки overlay_audio_on_video ×3 + add_centered_subtitles ×3
+(шесть полных перекодирований) с однопроходной compose_video.
+
+Запуск (из корня репозитория):
+    python -m benchmarks.compose_benchmark --seconds 30 --out /tmp/compose_bench
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from moviepy import VideoClip
+
+from video_processing.audio_on_video import overlay_audio_on_video
+from video_processing.compose import AudioCue, SubtitleCue, compose_video
+from video_processing.subtitles import add_centered_subtitles
+
+SAMPLE_RATE = 48000
+TEXTS = [
+    'Белые начинают с e4 и сразу захватывают центр. Черные отвечают симметрично.',
+    'На двадцатом ходу конь прыгает на f5! Это тактический удар, которого никто не ждал.',
+    'Партия завершается матом. Подписывайтесь на канал, чтобы не пропустить новые разборы!',
+]
+
+
+def write_source_video(path, seconds, size=(1080, 1920), fps=30):
+    # Синтетическое видео с движущейся полосой, чтобы кодеру было что сжимать
+    width, height = size
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def make_frame(t):
+        frame = base.copy()
+        y = int(t * 200) % height
+        frame[y:y + 40] = 255
+        return frame
+
+    VideoClip(make_frame, duration=seconds).with_fps(fps).write_videofile(path, codec='libx264', audio=False, logger=None)
+
+
+def tone(seconds, freq):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return 0.2 * np.sin(2 * np.pi * freq * t).astype(np.float32), SAMPLE_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--out', default='compose_bench')
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+
+    source = os.path.join(args.out, 'source.mp4')
+    write_source_video(source, args.seconds)
+
+    segment = args.seconds / 3
+    cues = [(text, i * segment, segment * 0.8, tone(segment * 0.8, 220 * (i + 1))) for i, text in enumerate(TEXTS)]
+
+    started = time.perf_counter()
+    current = source
+    for i, (_, start, _, audio) in enumerate(cues):
+        path = os.path.join(args.out, f'chain_audio_{i}.mp4')
+        overlay_audio_on_video(current, audio, start, path)
+        current = path
+    for i, (text, start, duration, _) in enumerate(cues):
+        path = os.path.join(args.out, f'chain_subs_{i}.mp4')
+        add_centered_subtitles(current, text, 500, start, duration, font_size=40, output_path=path)
+        current = path
+    chain_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    compose_video(
+        source,
+        os.path.join(args.out, 'composed.mp4'),
+        audio_cues=[AudioCue(audio, start) for _, start, _, audio in cues],
+        subtitle_cues=[SubtitleCue(text, start, duration) for text, start, duration, _ in cues],
+    )
+    compose_seconds = time.perf_counter() - started
+
+    print(f'видео: {args.seconds:.0f} с, 1080×1920')
+    print(f'цепочка из 6 перекодирований: {chain_seconds:.1f} с')
+    print(f'compose_video (1 проход):     {compose_seconds:.1f} с')
+    print(f'ускорение: {chain_seconds / compose_seconds:.1f}×')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Параллельный синтез по языкам (ParallelTTS) против последовательного
+TTSEngine.synthesize_batch на 6 языках × 3 сегментах комментария.
+Ожидается, что ParallelTTS укладывается примерно во время самого медленного языка.
+
+Запуск (из корня репозитория):
+    python -m benchmarks.parallel_tts_benchmark --out /tmp/tts_bench
+"""
+import argparse
+import os
+import time
+
+from tts import ParallelTTS, TTSEngine
+
+from .tts_batch_benchmark import SEGMENTS
+
+
+def synthesis_seconds(tts):
+    """Суммарное время синтеза по языкам во всех воркерах ParallelTTS."""
+    seconds = {}
+    for timings in tts.timings.values():
+        seconds.update(timings['synthesis_seconds'])
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--out', default='tts_bench')
+    parser.add_argument('--workers', type=int, default=None, help='число процессов ParallelTTS')
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+
+    items = [
+        (text, lang, os.path.join(args.out, f'{lang}_{i}.wav'))
+        for lang, texts in SEGMENTS.items()
+        for i, text in enumerate(texts)
+    ]
+
+    # Модели загружаются заранее, чтобы сравнивать только синтез и запись
+    serial = TTSEngine(preload=list(SEGMENTS))
+    started = time.perf_counter()
+    serial.synthesize_batch(items)
+    serial_seconds = time.perf_counter() - started
+    serial_langs = serial.timings()['synthesis_seconds']
+
+    with ParallelTTS(languages=list(SEGMENTS), num_workers=args.workers) as tts:
+        # Прогрев: запуск процессов и загрузка моделей не входят в замер
+        tts.synthesize_batch(items)
+        before = synthesis_seconds(tts)
+
+        started = time.perf_counter()
+        tts.synthesize_batch(items)
+        parallel_seconds = time.perf_counter() - started
+        parallel_langs = {lang: seconds - before.get(lang, 0.0) for lang, seconds in synthesis_seconds(tts).items()}
+
+    print(f"{'язык':>6} {'последовательно, с':>20} {'ParallelTTS, с':>16}")
+    for lang in SEGMENTS:
+        print(f'{lang:>6} {serial_langs.get(lang, 0.0):>20.2f} {parallel_langs.get(lang, 0.0):>16.2f}')
+
+    slowest = max(parallel_langs, key=parallel_langs.get)
+    print(f'TTSEngine.synthesize_batch: {serial_seconds:.2f} с')
+    print(f'ParallelTTS:                {parallel_seconds:.2f} с (x{serial_seconds / parallel_seconds:.2f})')
+    print(f'самый медленный язык:       {slowest}, {parallel_langs[slowest]:.2f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Масштабирование рендера по кускам (render_chunked) от 1 до N процессов
+на 60-секундном ролике 1080×1920 по сравнению с однопроцессным compose_video.
+
+Запуск (из корня репозитория):
+    python -m benchmarks.render_benchmark --seconds 60 --out /tmp/render_bench
+"""
+import argparse
+import os
+import time
+
+from video_processing.compose import AudioCue, SubtitleCue, compose_video
+from video_processing.render import render_chunked
+
+from .compose_benchmark import TEXTS, tone, write_source_video
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--out', default='render_bench')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--preset', default='veryfast')
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+
+    source = os.path.join(args.out, 'source.mp4')
+    write_source_video(source, args.seconds)
+
+    segment = args.seconds / len(TEXTS)
+    audio_cues = [AudioCue(tone(segment * 0.8, 220 * (i + 1)), i * segment) for i in range(len(TEXTS))]
+    subtitle_cues = [SubtitleCue(text, i * segment, segment * 0.8) for i, text in enumerate(TEXTS)]
+
+    started = time.perf_counter()
+    compose_video(source, os.path.join(args.out, 'single.mp4'), audio_cues, subtitle_cues)
+    baseline = time.perf_counter() - started
+    print(f'видео: {args.seconds:.0f} с, 1080×1920, пресет {args.preset}')
+    print(f"{'процессов':>10} {'время, с':>10} {'ускорение':>10}")
+    print(f"{'compose':>10} {baseline:>10.1f} {1.0:>10.2f}")
+
+    workers = 1
+    while True:
+        started = time.perf_counter()
+        render_chunked(
+            source, os.path.join(args.out, f'chunked_{workers}.mp4'), audio_cues, subtitle_cues,
+            workers=workers, preset=args.preset,
+        )
+        seconds = time.perf_counter() - started
+        print(f'{workers:>10} {seconds:>10.1f} {baseline / seconds:>10.2f}')
+        if workers >= args.max_workers:
+            break
+        workers = min(workers * 2, args.max_workers)
+
+
+if __name__ == '__main__':
+    main()
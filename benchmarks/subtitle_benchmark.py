@@ -0,0 +1,65 @@
+"""
+Скорость наложения субтитров в кадрах/с на ролике 1080×1920: CompositeVideoClip
+из ImageClip на каждый фрагмент против фильтра кадров SubtitleTrack.
+Измеряется только получение кадров (без кодирования).
+
+Запуск (из корня репозитория):
+    python -m benchmarks.subtitle_benchmark --seconds 20
+"""
+import argparse
+import time
+
+import numpy as np
+from moviepy import CompositeVideoClip, VideoClip
+
+from video_processing.subtitles import (
+    SubtitleTrack, apply_subtitle_track, centered_rectangle, layout_subtitles, make_subtitle_clips
+)
+
+from .compose_benchmark import TEXTS
+
+SIZE = (1080, 1920)
+FPS = 30
+
+
+def measure_fps(clip, seconds):
+    times = np.arange(0, seconds, 1 / FPS)
+    started = time.perf_counter()
+    for t in times:
+        clip.get_frame(t)
+    return len(times) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+
+    width, height = SIZE
+    base = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    # Как кадры из VideoFileClip: только для чтения, фильтр рисует в копию
+    base.flags.writeable = False
+    video = VideoClip(lambda t: base, duration=args.seconds).with_fps(FPS)
+
+    segment = args.seconds / len(TEXTS)
+    rectangle = centered_rectangle(SIZE, 500, 40)
+    cues = [(text, i * segment, segment * 0.9) for i, text in enumerate(TEXTS)]
+
+    clips = []
+    track = SubtitleTrack()
+    for text, start, duration in cues:
+        clips += make_subtitle_clips(text, start, rectangle, duration, font_size=40)
+        track.extend(layout_subtitles(text, start, rectangle, duration, font_size=40))
+
+    composite_fps = measure_fps(CompositeVideoClip([video] + clips), args.seconds)
+    filter_fps = measure_fps(apply_subtitle_track(video, track), args.seconds)
+    plain_fps = measure_fps(video, args.seconds)
+
+    print(f'кадр {width}×{height}, фрагментов субтитров: {len(track.items)}')
+    print(f'без субтитров:      {plain_fps:8.1f} кадр/с')
+    print(f'CompositeVideoClip: {composite_fps:8.1f} кадр/с')
+    print(f'SubtitleTrack:      {filter_fps:8.1f} кадр/с ({filter_fps / composite_fps:.1f}×)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Сравнение пошагового синтеза (tts.synthesize в цикле) и TTSEngine.synthesize_batch
+на 6 языках × 3 сегментах комментария.
+
+Запуск (из корня репозитория):
+    python -m benchmarks.tts_batch_benchmark --out /tmp/tts_bench
+"""
+import argparse
+import os
+import time
+
+from tts import TTSEngine
+
+SEGMENTS = {
+    'ru': ['Белые начинают с e4 и сразу захватывают центр. Черные отвечают симметрично.',
+           'На двадцатом ходу конь прыгает на f5! Это тактический удар, которого никто не ждал.',
+           'Партия завершается матом. Подписывайтесь на канал, чтобы не пропустить новые разборы!'],
+    'en': ['White opens with e4 and takes the centre. Black answers symmetrically.',
+           'On move twenty the knight jumps to f5! A tactical blow nobody expected.',
+           'The game ends in checkmate. Subscribe so you do not miss new breakdowns!'],
+    'fr': ['Les blancs ouvrent avec e4 et prennent le centre. Les noirs répondent symétriquement.',
+           'Au vingtième coup, le cavalier saute en f5 ! Un coup tactique inattendu.',
+           'La partie se termine par un mat. Abonnez-vous pour ne rien manquer !'],
+    'es': ['Las blancas abren con e4 y toman el centro. Las negras responden simétricamente.',
+           '¡En la jugada veinte el caballo salta a f5! Un golpe táctico inesperado.',
+           'La partida termina en mate. ¡Suscríbete para no perderte nuevos análisis!'],
+    'de': ['Weiß eröffnet mit e4 und besetzt das Zentrum. Schwarz antwortet symmetrisch.',
+           'Im zwanzigsten Zug springt der Springer nach f5! Ein unerwarteter taktischer Schlag.',
+           'Die Partie endet mit Matt. Abonniere den Kanal, um nichts zu verpassen!'],
+    'hi': ['सफेद e4 से शुरू करता है और केंद्र पर कब्जा करता है। काला सममित जवाब देता है।',
+           'बीसवीं चाल पर घोड़ा f5 पर कूदता है! एक अप्रत्याशित सामरिक वार।',
+           'खेल शह और मात के साथ समाप्त होता है। नए विश्लेषण के लिए सदस्यता लें!'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--out', default='tts_bench')
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+
+    items = [
+        (text, lang, os.path.join(args.out, f'{lang}_{i}.wav'))
+        for lang, texts in SEGMENTS.items()
+        for i, text in enumerate(texts)
+    ]
+
+    # Модели загружаются заранее, чтобы сравнивать только синтез и запись
+    tts = TTSEngine(preload=list(SEGMENTS))
+
+    started = time.perf_counter()
+    loop_durations = [tts.synthesize(text, lang, out_wav) for text, lang, out_wav in items]
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch_durations = tts.synthesize_batch(items)
+    batch_seconds = time.perf_counter() - started
+
+    print(f'фрагментов: {len(items)}, аудио: {sum(batch_durations):.1f} с')
+    print(f'цикл synthesize:  {loop_seconds:.2f} с (аудио {sum(loop_durations):.1f} с)')
+    print(f'synthesize_batch: {batch_seconds:.2f} с')
+    print(f'ускорение: x{loop_seconds / batch_seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main()
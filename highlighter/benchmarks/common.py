@@ -0,0 +1,30 @@
+import random
+import chess
+import chess.pgn
+
+
+def random_game(n_plies: int, seed: int = 0) -> chess.pgn.Game:
+    """
+    Генерирует партию из случайных легальных ходов (для бенчмарков).
+    Если партия закончилась матом или патом раньше, она получается короче n_plies полуходов.
+    """
+    rng = random.Random(seed)
+    game = chess.pgn.Game()
+    node = game
+    board = game.board()
+    for _ in range(n_plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        node = node.add_variation(move)
+        board.push(move)
+    return game
+
+
+def write_random_pgn(path: str, n_games: int, n_plies: int, seed: int = 0) -> str:
+    """Записывает несколько случайных партий в один PGN-файл."""
+    with open(path, 'w') as f:
+        for i in range(n_games):
+            print(random_game(n_plies, seed + i), file=f, end='\n\n')
+    return path
@@ -0,0 +1,62 @@
+"""
+Сравнение покомпозиционного и батчевого инференса Board2Vec на одной партии.
+
+Запуск (из каталога highlighter):
+    python -m benchmarks.embed_benchmark --plies 150 --repeat 5
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from highlighter.board2vec import Board2Vec
+from highlighter.encoder import MatrixEncoder
+from highlighter.main import embed_boards
+
+from .common import random_game
+
+
+def encode_game(game):
+    encoder = MatrixEncoder()
+    board = game.board()
+    boards = [encoder.encode(board)]
+    for move in game.mainline_moves():
+        board.push(move)
+        boards.append(encoder.encode(board))
+    return boards
+
+
+def per_position(boards, model):
+    return np.array([model(torch.tensor(x).unsqueeze(0)).detach().numpy() for x in boards]).reshape((len(boards), 64))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plies', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    model = Board2Vec(128, 64).eval()
+    boards = encode_game(random_game(args.plies))
+
+    def timeit(fn):
+        fn()  # прогрев
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            out = fn()
+        return (time.perf_counter() - started) / args.repeat, out
+
+    t_loop, ref = timeit(lambda: per_position(boards, model))
+    t_batch, out = timeit(lambda: embed_boards(boards, model, batch_size=args.batch_size))
+
+    print(f'позиций: {len(boards)}')
+    print(f'по одной позиции: {t_loop * 1000:.1f} мс')
+    print(f'батчами:          {t_batch * 1000:.1f} мс')
+    print(f'ускорение:        x{t_loop / t_batch:.1f}')
+    print(f'макс. расхождение: {np.abs(ref - out).max():.2e}')
+
+
+if __name__ == '__main__':
+    main()
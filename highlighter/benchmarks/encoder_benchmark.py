@@ -0,0 +1,69 @@
+"""
+Сравнение поклеточного кодирования досок и пакетного кодирования партии битбордами.
+
+Запуск (из каталога highlighter):
+    python -m benchmarks.encoder_benchmark --plies 400 --games 20
+"""
+import argparse
+import time
+
+import chess
+import numpy as np
+
+from highlighter.encoder import MatrixEncoder
+
+from .common import random_game
+
+
+def encode_by_squares(board):
+    board_state = np.zeros((12, 8, 8), dtype=np.float32)
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece is not None:
+            channel = piece.piece_type - 1 + (6 if piece.color == chess.BLACK else 0)
+            board_state[channel, square // 8, square % 8] = 1.0
+    return board_state
+
+
+def encode_game_by_squares(board, moves):
+    board = board.copy()
+    boards = [encode_by_squares(board)]
+    for move in moves:
+        board.push(move)
+        boards.append(encode_by_squares(board))
+    return np.array(boards)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plies', type=int, default=400)
+    parser.add_argument('--games', type=int, default=20)
+    args = parser.parse_args()
+
+    games = [random_game(args.plies, seed) for seed in range(args.games)]
+    games = [(game.board(), list(game.mainline_moves())) for game in games]
+    encoder = MatrixEncoder()
+    buffer = np.empty((max(len(m) for _, m in games) + 1, 12, 8, 8), dtype=np.float32)
+
+    variants = {
+        'по клеткам': lambda b, m: encode_game_by_squares(b, m),
+        'битборды': lambda b, m: encoder.encode_game(b, m, out=buffer),
+        'битборды, инкрементально': lambda b, m: encoder.encode_game(b, m, out=buffer, incremental=True),
+    }
+
+    reference = [encode_game_by_squares(b, m) for b, m in games]
+    timings = {}
+    for name, fn in variants.items():
+        started = time.perf_counter()
+        for (b, m), ref in zip(games, reference):
+            out = fn(b, m)
+            assert np.array_equal(out, ref)
+        timings[name] = time.perf_counter() - started
+
+    base = timings['по клеткам']
+    for name, elapsed in timings.items():
+        print(f'{name:<26} {elapsed * 1000 / len(games):8.2f} мс/партия  x{base / elapsed:.1f}')
+
+
+if __name__ == '__main__':
+    main()
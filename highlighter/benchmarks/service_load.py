@@ -0,0 +1,86 @@
+"""
+Генератор нагрузки для highlighter.service.
+
+Запуск (из каталога highlighter, при запущенном сервисе):
+    python -m benchmarks.service_load --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from .common import random_game
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, pgns, counter, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter:
+            pgn = pgns[counter.pop() % len(pgns)]
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, host, 'POST', '/highlight', {'pgn': pgn})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    pgns = [str(random_game(args.plies, seed)) for seed in range(args.distinct)]
+    counter = list(range(args.requests))
+    latencies, statuses = [], {}
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, pgns, counter, latencies, statuses) for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    print(f'запросов: {args.requests}, параллельно: {args.concurrency}, статусы: {statuses}')
+    print(f'пропускная способность: {len(latencies) / elapsed:.1f} партий/с')
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f'задержка: p50 {p50:.1f} мс, p95 {p95:.1f} мс, p99 {p99:.1f} мс')
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, metrics = await request(reader, writer, args.host, 'GET', '/metrics')
+    writer.close()
+    print('размер батча на сервере:', {k: metrics['batch_size'][k] for k in ('mean', 'p50', 'p95')})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--plies', type=int, default=120)
+    parser.add_argument('--distinct', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Время и пиковая память скользящего инференса трансформера на длинных партиях
+в сравнении с обрезкой до первых 200 полуходов.
+
+Запуск (из каталога highlighter):
+    python -m benchmarks.window_benchmark --plies 300 400 600
+"""
+import argparse
+import resource
+import time
+
+import numpy as np
+import torch
+
+from highlighter.main import MAX_PLIES, score_games
+from highlighter.transformer import BinaryClassifierTransformer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--plies', type=int, nargs='+', default=[300, 400, 600])
+    parser.add_argument('--games', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    model = BinaryClassifierTransformer(64).eval()
+    rng = np.random.default_rng(0)
+
+    for plies in args.plies:
+        embeddings = [rng.standard_normal((plies, 64), dtype=np.float32) for _ in range(args.games)]
+        truncated = [e[:MAX_PLIES] for e in embeddings]
+
+        timings = {}
+        for name, batch in (('обрезка до 200', truncated), ('окна', embeddings)):
+            score_games(model, batch)  # прогрев
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                scores = score_games(model, batch)
+            timings[name] = (time.perf_counter() - started) / args.repeat / args.games
+            assert all(len(s) == len(e) for s, e in zip(scores, batch))
+
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f'{plies:4d} полуходов: обрезка {timings["обрезка до 200"] * 1000:7.1f} мс/партия, '
+            f'окна {timings["окна"] * 1000:7.1f} мс/партия, пик RSS {peak_mb:.0f} МБ'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,2 +1,5 @@
 # from .dummy import dummy as find_highlight
-from .main import find_highlight
\ No newline at end of file
+from .main import find_highlight, find_highlights, find_highlights_in_file
+from .pgn_stream import iter_games, iter_game_tensors, load_offsets
+from .registry import ModelRegistry, get_registry, set_registry
+from .cache import EmbeddingCache, GameCache, position_keys
\ No newline at end of file
@@ -0,0 +1,179 @@
+import copy  # Для копирования модели перед экспортом
+import os  # Для работы с путями
+from typing import List, Optional, Tuple
+
+import torch  # Для работы с PyTorch моделями
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+# Поддерживаемые бэкенды инференса
+BACKENDS = ('eager', 'quantized', 'onnx')
+
+BOARD2VEC_ONNX_FILENAME = 'board2vec.onnx'
+TRANSFORMER_ONNX_FILENAME = 'transformer.onnx'
+BOARD2VEC_INT8_FILENAME = 'board2vec_int8.pt'
+TRANSFORMER_INT8_FILENAME = 'transformer_int8.pt'
+
+
+def disable_fastpath(model: nn.Module) -> nn.Module:
+    """
+    Отключает «быстрый путь» nn.TransformerEncoder (nested tensor и слитое ядро слоя).
+    Он не поддерживает квантованные веса и не экспортируется в ONNX;
+    обычный путь вычисляет то же самое.
+    """
+    for module in model.modules():
+        if isinstance(module, nn.TransformerEncoder):
+            module.use_nested_tensor = False
+        elif isinstance(module, nn.TransformerEncoderLayer):
+            module.activation_relu_or_gelu = 0
+    return model
+
+
+def quantize(model: nn.Module) -> nn.Module:
+    """
+    Динамически квантует линейные слои модели в int8 (только CPU).
+    Свёртки Board2Vec остаются в fp32: динамическая квантизация их не поддерживает.
+
+    Аргументы:
+        model: nn.Module - модель в режиме eval
+
+    Возвращает:
+        nn.Module - квантованная копия модели
+    """
+    quantized = torch.ao.quantization.quantize_dynamic(model.cpu(), {nn.Linear}, dtype=torch.qint8)
+    return disable_fastpath(quantized)
+
+
+class RowwiseModel(nn.Module):
+    """
+    Вызывает модель отдельно для каждого элемента батча, отбрасывая его паддинг.
+
+    Динамическая квантизация считает масштаб активаций по всему входному тензору,
+    поэтому результат квантованной модели зависит от соседей по батчу и длины
+    паддинга. Построчный вызов делает оценки партии одинаковыми в любом батче.
+    """
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor, padding_mask: Optional[torch.Tensor] = None) -> torch.Tensor:
+        if padding_mask is None:
+            return torch.cat([self.model(x[i:i + 1]) for i in range(x.size(0))])
+
+        # Паддинг всегда в конце последовательности (см. main.pad_sequences)
+        rows = []
+        for i in range(x.size(0)):
+            length = max(1, int((~padding_mask[i]).sum()))
+            row = self.model(x[i:i + 1, :length], padding_mask[i:i + 1, :length])
+            rows.append(F.pad(row, (0, x.size(1) - length)))
+        return torch.cat(rows)
+
+
+def export_board2vec_onnx(model: nn.Module, path: str):
+    """Экспортирует Board2Vec в ONNX с динамическим размером батча."""
+    example = torch.zeros(1, 12, 8, 8)
+    torch.onnx.export(
+        model.cpu().eval(), (example,), path,
+        input_names=['boards'], output_names=['embeddings'],
+        dynamic_shapes={'boards': {0: torch.export.Dim('batch')}},
+        dynamo=True,
+    )
+
+
+def export_transformer_onnx(model: nn.Module, path: str, seq_len: int = 200):
+    """Экспортирует BinaryClassifierTransformer в ONNX с динамическими батчем и длиной."""
+    example = torch.zeros(2, seq_len, 64)
+    mask = torch.zeros(2, seq_len, dtype=torch.bool)
+    mask[1, seq_len // 2:] = True
+    model = disable_fastpath(copy.deepcopy(model).cpu().eval())
+    batch, seq = torch.export.Dim('batch'), torch.export.Dim('seq', max=seq_len)
+    torch.onnx.export(
+        model, (example, mask), path,
+        input_names=['embeddings', 'padding_mask'], output_names=['scores'],
+        dynamic_shapes={'x': {0: batch, 1: seq}, 'padding_mask': {0: batch, 1: seq}},
+        dynamo=True,
+    )
+
+
+class OnnxModel:
+    """
+    Обёртка над сессией ONNX Runtime с интерфейсом модели PyTorch:
+    принимает и возвращает тензоры torch.
+    """
+
+    def __init__(self, path: str, num_threads: int = 0):
+        """
+        Аргументы:
+            path: путь к .onnx файлу
+            num_threads: число потоков внутри оператора (0 - по умолчанию ONNX Runtime)
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("Для бэкенда 'onnx' требуется пакет onnxruntime") from e
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"ONNX модель не найдена: {path}. Выполните python -m highlighter.export")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, *inputs: torch.Tensor) -> torch.Tensor:
+        feeds = {name: x.cpu().numpy() for name, x in zip(self.input_names, inputs)}
+        output, = self.session.run(None, feeds)
+        return torch.from_numpy(output)
+
+    def eval(self):
+        return self
+
+    def nbytes(self) -> int:
+        """Размер модели на диске вместе с файлами внешних весов (.onnx.data)."""
+        return os.path.getsize(self.path) + sum(os.path.getsize(p) for p in onnx_external_data_paths(self.path))
+
+
+def onnx_external_data_paths(path: str) -> List[str]:
+    """
+    Файлы внешних весов ONNX-модели.
+    Экспорт с dynamo=True сохраняет веса рядом с моделью в <path>.data.
+    """
+    try:
+        import onnx
+    except ImportError:
+        return [p for p in (f'{path}.data',) if os.path.exists(p)]
+
+    graph = onnx.load(path, load_external_data=False).graph
+    directory = os.path.dirname(path)
+    locations = {
+        entry.value
+        for tensor in graph.initializer if onnx.external_data_helper.uses_external_data(tensor)
+        for entry in tensor.external_data if entry.key == 'location'
+    }
+    return [os.path.join(directory, location) for location in sorted(locations)]
+
+
+def export_quantized(model: nn.Module, path: str, *example: torch.Tensor):
+    """Квантует модель и сохраняет её как TorchScript."""
+    with torch.inference_mode():
+        traced = torch.jit.trace(quantize(model.eval()), example)
+    torch.jit.save(traced, path)
+
+
+def onnx_paths(checkpoints_dir: str) -> Tuple[str, str]:
+    """Пути к ONNX-вариантам Board2Vec и трансформера в каталоге чекпоинтов."""
+    return (
+        os.path.join(checkpoints_dir, BOARD2VEC_ONNX_FILENAME),
+        os.path.join(checkpoints_dir, TRANSFORMER_ONNX_FILENAME),
+    )
+
+
+def int8_paths(checkpoints_dir: str) -> Tuple[str, str]:
+    """Пути к квантованным TorchScript-вариантам Board2Vec и трансформера."""
+    return (
+        os.path.join(checkpoints_dir, BOARD2VEC_INT8_FILENAME),
+        os.path.join(checkpoints_dir, TRANSFORMER_INT8_FILENAME),
+    )
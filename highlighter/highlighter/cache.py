@@ -0,0 +1,286 @@
+import hashlib  # Для хэширования содержимого PGN
+import json  # Для хранения результатов партий
+import os  # Для работы с файлами кэша
+import threading  # Для потокобезопасного доступа
+from collections import OrderedDict  # Для LRU в памяти
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import chess.polyglot  # Таблица случайных чисел Zobrist
+import numpy as np  # Для работы с массивами
+
+try:
+    import fcntl  # Межпроцессная блокировка (POSIX)
+except ImportError:
+    fcntl = None
+    import msvcrt  # Межпроцессная блокировка (Windows)
+
+
+def _piece_square_table() -> np.ndarray:
+    """
+    Строит таблицу Zobrist (12, 64) из ключей polyglot в порядке каналов MatrixEncoder.
+    В polyglot индекс фигуры kind = 2 * (piece_type - 1) + (1 для белых, 0 для черных).
+    """
+    table = np.empty((12, 64), dtype=np.uint64)
+    for channel in range(12):
+        piece_type = channel % 6
+        kind = 2 * piece_type + (1 if channel < 6 else 0)
+        table[channel] = chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * kind:64 * (kind + 1)]
+    return table
+
+
+_ZOBRIST_TABLE = _piece_square_table()
+
+
+def position_keys(boards: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет ключи Zobrist для закодированных досок.
+
+    Ключ совпадает с chess.polyglot.zobrist_hash без учёта очереди хода,
+    рокировок и взятия на проходе: Board2Vec видит только расстановку фигур,
+    поэтому позиции с одинаковой расстановкой имеют одинаковый эмбеддинг.
+
+    Аргументы:
+        boards: np.ndarray - доски формы (N, 12, 8, 8)
+
+    Возвращает:
+        np.ndarray - ключи uint64 формы (N,)
+    """
+    occupied = np.asarray(boards).reshape(-1, 12 * 64) > 0
+    masked = np.where(occupied, _ZOBRIST_TABLE.reshape(1, -1), np.uint64(0))
+    return np.bitwise_xor.reduce(masked, axis=1)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Эксклюзивная межпроцессная блокировка на файле path."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    """
+    Кэш эмбеддингов Board2Vec по ключу позиции.
+
+    На диске хранится отображаемый в память массив float16 (capacity, dim)
+    и журнал ключей строк (uint64, только дозапись); в памяти - LRU из
+    последних использованных эмбеддингов.
+
+    Каталог можно делить между процессами: новые строки добавляются под
+    файловой блокировкой в конец общего журнала после подхвата строк,
+    записанных другими процессами, а ключ дописывается только после
+    записи самого эмбеддинга.
+    """
+
+    def __init__(self, cache_dir: str, dim: int = 64, max_memory_items: int = 100_000,
+                 initial_capacity: int = 65_536):
+        """
+        Аргументы:
+            cache_dir: каталог кэша
+            dim: размерность эмбеддинга
+            max_memory_items: число эмбеддингов в LRU в памяти
+            initial_capacity: начальное число строк файла на диске
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.dim = dim
+        self.max_memory_items = max_memory_items
+        self._data_path = os.path.join(cache_dir, 'embeddings.f16')
+        self._keys_path = os.path.join(cache_dir, 'keys.u64')
+        self._lock_path = os.path.join(cache_dir, '.lock')
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._rows: Dict[int, int] = {}
+        self._keys: list = []
+        self._capacity = 0
+
+        with _file_lock(self._lock_path):
+            self._sync()
+            capacity = max(initial_capacity, len(self._keys))
+            if os.path.exists(self._data_path):
+                capacity = max(capacity, os.path.getsize(self._data_path) // (2 * dim))
+            self._open(capacity)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self, capacity: int):
+        """Открывает (и при необходимости расширяет) файл эмбеддингов."""
+        nbytes = capacity * self.dim * 2
+        with open(self._data_path, 'ab') as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+            # Файл мог быть расширен другим процессом
+            capacity = max(capacity, f.tell() // (2 * self.dim))
+        self._capacity = capacity
+        self._data = np.memmap(self._data_path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+
+    def _sync(self):
+        """Подхватывает ключи, дописанные в журнал другими процессами."""
+        try:
+            count = os.path.getsize(self._keys_path) // 8
+        except FileNotFoundError:
+            return
+        if count <= len(self._keys):
+            return
+        with open(self._keys_path, 'rb') as f:
+            f.seek(len(self._keys) * 8)
+            tail = np.frombuffer(f.read((count - len(self._keys)) * 8), dtype=np.uint64)
+        for key in tail.tolist():
+            self._rows.setdefault(key, len(self._keys))
+            self._keys.append(key)
+        if self._capacity and len(self._keys) > self._capacity:
+            self._open(len(self._keys))
+
+    def _remember(self, key: int, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: int) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        vector = np.asarray(self._data[row], dtype=np.float32)
+        self._remember(key, vector)
+        return vector
+
+    def _store(self, keys, vectors: np.ndarray):
+        with _file_lock(self._lock_path):
+            self._sync()
+            new = [(key, vector) for key, vector in zip(keys, vectors) if key not in self._rows]
+            if not new:
+                return
+            needed = len(self._keys) + len(new)
+            if needed > self._capacity:
+                self._data.flush()
+                self._open(max(needed, 2 * self._capacity))
+
+            start = len(self._keys)
+            self._data[start:start + len(new)] = np.stack([vector for _, vector in new])
+            self._data.flush()
+
+            # Ключи дописываются после эмбеддингов; обрывок незавершённой записи отбрасывается
+            with open(self._keys_path, 'r+b' if os.path.exists(self._keys_path) else 'wb') as f:
+                f.truncate(start * 8)
+                f.seek(start * 8)
+                f.write(np.array([key for key, _ in new], dtype=np.uint64).tobytes())
+
+            for offset, (key, vector) in enumerate(new):
+                self._rows[key] = start + offset
+                self._keys.append(key)
+                self._remember(key, vector)
+
+    def embed(self, boards: np.ndarray, compute: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Возвращает эмбеддинги досок, вычисляя через compute только отсутствующие в кэше.
+
+        Аргументы:
+            boards: np.ndarray - доски формы (N, 12, 8, 8)
+            compute: функция, переводящая доски (M, 12, 8, 8) в эмбеддинги (M, dim)
+
+        Возвращает:
+            np.ndarray - эмбеддинги формы (N, dim), float32
+        """
+        boards = np.asarray(boards)
+        keys = position_keys(boards).tolist()
+        result = np.empty((len(keys), self.dim), dtype=np.float32)
+
+        missing: Dict[int, list] = {}
+        with self._lock:
+            self._sync()
+            for i, key in enumerate(keys):
+                vector = self._lookup(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    result[i] = vector
+            self.hits += len(keys) - sum(len(rows) for rows in missing.values())
+            self.misses += sum(len(rows) for rows in missing.values())
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            computed = np.asarray(compute(boards[first_rows]), dtype=np.float32)
+            for rows, vector in zip(missing.values(), computed):
+                result[rows] = vector
+            with self._lock:
+                self._store(list(missing), computed)
+
+        return result
+
+    def flush(self):
+        """Сбрасывает эмбеддинги на диск (журнал ключей дописывается сразу при добавлении)."""
+        with self._lock:
+            self._data.flush()
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def pgn_content_hash(pgn_path: str) -> str:
+    """Хэш содержимого PGN-файла (sha256 в hex)."""
+    digest = hashlib.sha256()
+    with open(pgn_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GameCache:
+    """
+    Кэш итоговых ключевых моментов партий по хэшу содержимого PGN.
+    Каждая запись - отдельный JSON-файл, поэтому кэш можно делить между процессами.
+    """
+
+    def __init__(self, cache_dir: str, version: str = ''):
+        """
+        Аргументы:
+            cache_dir: каталог кэша
+            version: версия моделей; при её смене старые записи не используются
+        """
+        self.cache_dir = cache_dir
+        self.version = version
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, content_hash: str) -> str:
+        key = hashlib.sha256(f'{self.version}:{content_hash}'.encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        """Возвращает сохранённый результат или None."""
+        path = self._path(content_hash)
+        try:
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, content_hash: str, result: dict):
+        """Сохраняет результат для партии."""
+        path = self._path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
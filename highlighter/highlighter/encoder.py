@@ -1,6 +1,18 @@
 import chess  # Для работы с шахматной доской и правилами
 import numpy as np  # Для работы с многомерными массивами
-from typing import Literal, Union, List, Tuple  # Для аннотаций типов
+from typing import Literal, Union, List, Optional, Tuple  # Для аннотаций типов
+
+
+def _unpack_masks(masks: np.ndarray, out: np.ndarray):
+    """
+    Распаковывает 64-битные битборды в матрицы 8x8 (клетка i -> строка i // 8, столбец i % 8).
+
+    Args:
+        masks: Массив битбордов dtype '<u8' произвольной формы (...)
+        out: Буфер float32 формы (..., 8, 8) для результата
+    """
+    bits = np.unpackbits(masks.view(np.uint8), bitorder='little')
+    np.copyto(out, bits.reshape(out.shape), casting='unsafe')
 
 
 class MatrixEncoder:
@@ -21,26 +33,116 @@ class MatrixEncoder:
             - 12 каналов (6 типов фигур × 2 цвета)
             - 8x8 - шахматная доска
         """
-        # 12 каналов для фигур (6 типов × 2 цвета)
-        board_state = np.zeros((12, 8, 8), dtype=np.float32)
-
-        # Кодируем состояние доски
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece is not None:
-                # Определяем канал:
-                # 0-5: белые пешка, конь, слон, ладья, ферзь, король
-                # 6-11: черные пешка, конь, слон, ладья, ферзь, король
-                channel = piece.piece_type - 1
-                if piece.color == chess.BLACK:
-                    channel += 6
-                # Преобразуем координаты квадрата в строку и столбец
-                row = square // 8
-                col = square % 8
-                board_state[channel, row, col] = 1.0
-
+        board_state = np.empty((12, 8, 8), dtype=np.float32)
+        _unpack_masks(np.array(self._piece_masks(board), dtype='<u8'), board_state)
         return board_state
 
+    @staticmethod
+    def _piece_masks(board: chess.Board) -> List[int]:
+        """
+        Возвращает битборды фигур в порядке каналов:
+        0-5: белые пешка, конь, слон, ладья, ферзь, король
+        6-11: черные пешка, конь, слон, ладья, ферзь, король
+        """
+        return [
+            board.pieces_mask(piece_type, color)
+            for color in (chess.WHITE, chess.BLACK)
+            for piece_type in chess.PIECE_TYPES
+        ]
+
+    def encode_game(
+        self,
+        board: chess.Board,
+        moves: List[chess.Move],
+        out: Optional[np.ndarray] = None,
+        incremental: bool = False,
+    ) -> np.ndarray:
+        """
+        Кодирует начальную позицию и позиции после каждого хода партии
+        в один массив (N, 12, 8, 8), где N = len(moves) + 1.
+
+        Args:
+            board: Начальная позиция (не изменяется)
+            moves: Ходы партии
+            out: Предвыделенный буфер float32 формы не меньше (N, 12, 8, 8).
+                 Если не задан, выделяется новый
+            incremental: Если True, битборды каждой позиции получаются из
+                 предыдущих изменением только клеток, затронутых ходом,
+                 без пересчёта по всей доске
+
+        Returns:
+            Массив numpy (N, 12, 8, 8) - срез буфера out
+        """
+        n = len(moves) + 1
+        if out is None:
+            out = np.empty((n, 12, 8, 8), dtype=np.float32)
+        elif out.shape[0] < n or out.shape[1:] != (12, 8, 8) or out.dtype != np.float32:
+            raise ValueError(f"Буфер формы {out.shape} ({out.dtype}) не подходит для {n} позиций")
+        out = out[:n]
+
+        masks = np.empty((n, 12), dtype='<u8')
+        if incremental:
+            self._incremental_masks(board, moves, masks)
+        else:
+            board = board.copy(stack=False)
+            masks[0] = self._piece_masks(board)
+            for i, move in enumerate(moves, start=1):
+                board.push(move)
+                masks[i] = self._piece_masks(board)
+
+        _unpack_masks(masks, out)
+        return out
+
+    def _incremental_masks(self, board: chess.Board, moves: List[chess.Move], masks: np.ndarray):
+        """
+        Заполняет битборды позиций, не делая ходы на доске: для каждого хода
+        меняются только затронутые им клетки (откуда/куда, взятие, в том числе
+        на проходе, ладья при рокировке, превращение). Ходы считаются
+        легальными - как у партии, прочитанной из PGN.
+        """
+        current = self._piece_masks(board)
+        # Канал фигуры на каждой клетке (-1 - пусто)
+        squares = [-1] * 64
+        for channel, mask in enumerate(current):
+            for square in chess.scan_forward(mask):
+                squares[square] = channel
+        masks[0] = current
+
+        for i, move in enumerate(moves, start=1):
+            if move:
+                frm, to = move.from_square, move.to_square
+                channel = squares[frm]
+                offset = 0 if channel < 6 else 6
+                piece_type = channel - offset + 1
+                target = squares[to]
+
+                if piece_type == chess.KING and (abs(to - frm) == 2 or target == chess.ROOK - 1 + offset):
+                    # Рокировка: e1g1 или (chess960) король «берёт» свою ладью
+                    kingside = chess.square_file(to) > chess.square_file(frm)
+                    rank = chess.square_rank(frm)
+                    rook_from = to if target == chess.ROOK - 1 + offset else chess.square(7 if kingside else 0, rank)
+                    king_to = chess.square(6 if kingside else 2, rank)
+                    rook_to = chess.square(5 if kingside else 3, rank)
+                    rook = chess.ROOK - 1 + offset
+                    squares[frm] = squares[rook_from] = -1
+                    squares[king_to], squares[rook_to] = channel, rook
+                    # В chess960 король или ладья могут уже стоять на своей клетке назначения
+                    current[channel] = current[channel] & ~chess.BB_SQUARES[frm] | chess.BB_SQUARES[king_to]
+                    current[rook] = current[rook] & ~chess.BB_SQUARES[rook_from] | chess.BB_SQUARES[rook_to]
+                else:
+                    if target >= 0:
+                        current[target] ^= chess.BB_SQUARES[to]
+                    elif piece_type == chess.PAWN and chess.square_file(to) != chess.square_file(frm):
+                        # Взятие на проходе: побитая пешка стоит рядом с клеткой назначения
+                        captured = to ^ 8
+                        current[squares[captured]] ^= chess.BB_SQUARES[captured]
+                        squares[captured] = -1
+                    moved = (move.promotion or piece_type) - 1 + offset
+                    current[channel] ^= chess.BB_SQUARES[frm]
+                    current[moved] |= chess.BB_SQUARES[to]
+                    squares[frm], squares[to] = -1, moved
+            masks[i] = current
+
     def get_encoded_shape(self) -> Tuple[int, int, int]:
         """
         Возвращает форму закодированной матрицы.
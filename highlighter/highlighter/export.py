@@ -0,0 +1,143 @@
+"""
+Экспорт моделей хайлайтера для CPU-инференса и сравнение бэкендов.
+
+    python -m highlighter.export export [--checkpoints-dir DIR]
+    python -m highlighter.export compare PGN [PGN ...] [--report report.csv]
+"""
+import argparse
+import csv
+import time
+
+import numpy as np  # Для сравнения оценок
+import torch  # Для работы с PyTorch моделями
+
+from .backends import BACKENDS, export_board2vec_onnx, export_quantized, export_transformer_onnx, int8_paths, onnx_paths
+from .encoder import MatrixEncoder
+from .main import embed_boards, find_longest_segment_of_ones, inference, pgn_to_tensors, score_games
+from .registry import ModelRegistry
+
+
+def export(checkpoints_dir=None):
+    """
+    Создаёт int8 TorchScript и ONNX варианты Board2Vec и трансформера
+    в каталоге чекпоинтов.
+
+    Аргументы:
+        checkpoints_dir: str | None - каталог чекпоинтов (по умолчанию как в ModelRegistry)
+
+    Возвращает:
+        list[str] - пути к созданным файлам
+    """
+    registry = ModelRegistry(checkpoints_dir=checkpoints_dir, device='cpu', backend='eager')
+    board2vec, transformer = registry.board2vec, registry.transformer
+    board2vec_onnx, transformer_onnx = onnx_paths(registry.checkpoints_dir)
+    board2vec_int8, transformer_int8 = int8_paths(registry.checkpoints_dir)
+
+    export_board2vec_onnx(board2vec, board2vec_onnx)
+    export_transformer_onnx(transformer, transformer_onnx)
+    export_quantized(board2vec, board2vec_int8, torch.zeros(1, 12, 8, 8))
+    export_quantized(
+        transformer, transformer_int8, torch.zeros(1, 200, 64), torch.zeros(1, 200, dtype=torch.bool)
+    )
+    return [board2vec_onnx, transformer_onnx, board2vec_int8, transformer_int8]
+
+
+def _score_game(registry, tensors):
+    """Оценки трансформера для одной партии и время инференса в секундах."""
+    started = time.perf_counter()
+    embeds = embed_boards(tensors, registry.board2vec, device=registry.device)
+    scores = score_games(registry.transformer, [embeds], device=registry.device)[0]
+    return scores, time.perf_counter() - started
+
+
+def _overlap(a, b):
+    """IoU двух полуинтервалов [start, end)."""
+    inter = max(0, min(a[1], b[1]) - max(a[0], b[0]))
+    union = max(a[1], b[1]) - min(a[0], b[0])
+    return inter / union if union else 1.0
+
+
+def compare(pgn_paths, backends=BACKENDS, checkpoints_dir=None, report_path=None):
+    """
+    Сравнивает бэкенды с eager-моделью по точности и задержке на наборе партий.
+
+    Аргументы:
+        pgn_paths: list[str] - отложенный набор PGN-файлов (по одной партии)
+        backends: Iterable[str] - сравниваемые бэкенды
+        checkpoints_dir: str | None - каталог чекпоинтов
+        report_path: str | None - путь для CSV-отчёта по каждой партии
+
+    Возвращает:
+        dict - {бэкенд: {'latency_ms', 'max_abs_diff', 'mean_abs_diff', 'highlight_iou'}}
+    """
+    encoder = MatrixEncoder()
+    games = [(path, pgn_to_tensors(path, encoder)) for path in pgn_paths]
+    registries = {
+        backend: ModelRegistry(checkpoints_dir=checkpoints_dir, device='cpu', backend=backend)
+        for backend in dict.fromkeys(('eager',) + tuple(backends))
+    }
+    for registry in registries.values():
+        _score_game(registry, games[0][1])  # прогрев
+
+    rows = []
+    for path, tensors in games:
+        reference, _ = _score_game(registries['eager'], tensors)
+        reference_range = find_longest_segment_of_ones(inference(reference))
+        for backend, registry in registries.items():
+            scores, seconds = _score_game(registry, tensors)
+            diff = np.abs(scores - reference)
+            rows.append({
+                'pgn': path,
+                'backend': backend,
+                'plies': len(tensors),
+                'latency_ms': seconds * 1000,
+                'max_abs_diff': float(diff.max()),
+                'mean_abs_diff': float(diff.mean()),
+                'highlight_iou': _overlap(reference_range, find_longest_segment_of_ones(inference(scores))),
+            })
+
+    if report_path:
+        with open(report_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    summary = {}
+    for backend in registries:
+        selected = [row for row in rows if row['backend'] == backend]
+        summary[backend] = {
+            'latency_ms': float(np.mean([row['latency_ms'] for row in selected])),
+            'max_abs_diff': float(np.max([row['max_abs_diff'] for row in selected])),
+            'mean_abs_diff': float(np.mean([row['mean_abs_diff'] for row in selected])),
+            'highlight_iou': float(np.mean([row['highlight_iou'] for row in selected])),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checkpoints-dir', default=None)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('export')
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('pgn', nargs='+')
+    compare_parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    compare_parser.add_argument('--report', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        for path in export(args.checkpoints_dir):
+            print(path)
+        return
+
+    summary = compare(args.pgn, args.backends, args.checkpoints_dir, args.report)
+    print(f"{'бэкенд':<10} {'мс/партия':>10} {'макс. откл.':>12} {'ср. откл.':>10} {'IoU момента':>12}")
+    for backend, stats in summary.items():
+        print(
+            f"{backend:<10} {stats['latency_ms']:>10.1f} {stats['max_abs_diff']:>12.4f} "
+            f"{stats['mean_abs_diff']:>10.4f} {stats['highlight_iou']:>12.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,23 +2,24 @@
 import chess.pgn  # Для работы с PGN файлами шахматных партий
 import numpy as np  # Для работы с массивами и математическими операциями
 import torch  # Для работы с PyTorch моделями
-from scipy.signal import find_peaks, peak_widths  # Для поиска пиков и их характеристик
+from scipy.signal import find_peaks, peak_prominences, peak_widths  # Для поиска пиков и их характеристик
 
 # Импорты пользовательских модулей
 from .encoder import MatrixEncoder  # Кодировщик досок
-from .board2vec import Board2Vec  # Модель для преобразования досок в векторы
-from .transformer import BinaryClassifierTransformer
+from .registry import get_registry  # Реестр лениво загружаемых моделей
+from .pgn_stream import iter_game_tensors  # Потоковое чтение многопартийных PGN
+from .cache import pgn_content_hash  # Хэш содержимого PGN для кэша результатов
 
 def pgn_to_tensors(pgn_path, encoder):
     """
-    Преобразует единственную партию из PGN-файла в список тензоров (закодированных досок)
+    Преобразует единственную партию из PGN-файла в массив закодированных досок
     
     Аргументы:
         pgn_path: str - путь к PGN-файлу с одной партией
-        encoder - кодировщик досок (должен иметь метод encode)
+        encoder - кодировщик досок (должен иметь метод encode_game)
         
     Возвращает:
-        list[np.ndarray] - список закодированных досок для каждого хода партии
+        np.ndarray - закодированные доски (N, 12, 8, 8) для начальной позиции и каждого хода партии
     """
     with open(pgn_path) as pgn_file:
         game = chess.pgn.read_game(pgn_file)
@@ -29,19 +30,62 @@ def pgn_to_tensors(pgn_path, encoder):
         if chess.pgn.read_game(pgn_file) is not None:
             raise ValueError("PGN файл содержит более одной партии")
             
-        board = game.board()
-        moves = list(game.mainline_moves())
-        encoded_boards = []
-        
-        # Кодируем начальную позицию
-        encoded_boards.append(encoder.encode(board))
-        
-        # Кодируем позиции после каждого хода
-        for move in moves:
-            board.push(move)
-            encoded_boards.append(encoder.encode(board))
-            
-        return encoded_boards
+        return encoder.encode_game(game.board(), list(game.mainline_moves()))
+
+
+def embed_boards(boards, board2vec, batch_size=256, device=None):
+    """
+    Преобразует закодированные доски партии в эмбеддинги за несколько
+    прямых проходов Board2Vec фиксированного размера.
+
+    Аргументы:
+        boards: list[np.ndarray] | np.ndarray - доски формы (12, 8, 8) или массив (N, 12, 8, 8)
+        board2vec - модель Board2Vec в режиме eval
+        batch_size: int - максимальное число досок в одном прямом проходе
+        device: torch.device - устройство модели (по умолчанию CPU)
+
+    Возвращает:
+        np.ndarray - непрерывный массив эмбеддингов формы (N, output_dim)
+    """
+    stacked = torch.from_numpy(np.ascontiguousarray(np.asarray(boards, dtype=np.float32)))
+    if stacked.dim() != 4:
+        raise ValueError(f"Ожидался массив формы (N, 12, 8, 8), получено {tuple(stacked.shape)}")
+
+    parts = []
+    with torch.inference_mode():
+        for i in range(0, stacked.size(0), batch_size):
+            batch = stacked[i:i + batch_size]
+            if device is not None:
+                batch = batch.to(device, non_blocking=True)
+            parts.append(board2vec(batch).cpu())
+
+    if not parts:
+        # Ширину эмбеддинга сообщает сама модель (любой бэкенд): прогон одной пустой доски
+        example = torch.zeros(1, 12, 8, 8, device=device)
+        with torch.inference_mode():
+            dim = board2vec(example).shape[1]
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.ascontiguousarray(torch.cat(parts).numpy())
+
+
+def paint_intervals(length, starts, ends):
+    """
+    Строит бинарную маску длины length, равную 1 на полуинтервалах [start, end).
+
+    Аргументы:
+        length: int - длина маски
+        starts: np.ndarray - начала интервалов
+        ends: np.ndarray - концы интервалов (не включительно)
+
+    Возвращает:
+        np.ndarray - маска из 0 и 1 (int)
+    """
+    starts = np.clip(starts, 0, length)
+    ends = np.clip(ends, 0, length)
+    delta = np.zeros(length + 1, dtype=int)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends, -1)
+    return (np.cumsum(delta[:-1]) > 0).astype(int)
 
 
 def inference(y_pred):
@@ -50,11 +94,19 @@ def inference(y_pred):
     Обнаруживает пики и формирует маску активности.
 
     Аргументы:
-        y_pred: np.ndarray - массив предсказаний модели
+        y_pred: np.ndarray - массив предсказаний модели (N,), батч (B, N)
+            или список массивов разной длины
         
     Возвращает:
-        np.ndarray - бинарная маска активности
+        np.ndarray - бинарная маска активности той же формы (список масок для списка)
     """
+    if isinstance(y_pred, (list, tuple)):
+        return [inference(row) for row in y_pred]
+
+    y_pred = np.asarray(y_pred)
+    if y_pred.ndim == 2:
+        return np.stack([inference(row) for row in y_pred])
+
     # Применяем сглаживание
     kernel = np.ones(5) / 5
     smoothed = np.convolve(y_pred, kernel, mode='same')
@@ -67,30 +119,21 @@ def inference(y_pred):
         y_result = (smoothed > threshold).astype(int)
         return y_result
     
+    # Ширина пика на относительной высоте h равна ширине на уровне
+    # smoothed[peak] - prominence * h, поэтому индивидуальные высоты
+    # эмулируются масштабированием выраженности при rel_height=1
     rel_heights = np.minimum(1, smoothed[peaks] * 8)
-    widths_list, left_ips_list, right_ips_list = [], [], []
-    
-    for i, peak in enumerate(peaks):
-        w, _, l, r = peak_widths(smoothed, [peak], rel_height=rel_heights[i])
-        widths_list.append(w[0])
-        left_ips_list.append(l[0])
-        right_ips_list.append(r[0])
-    
-    widths = np.array(widths_list)
-    left_ips = np.array(left_ips_list)
-    right_ips = np.array(right_ips_list)
+    prominences, left_bases, right_bases = peak_prominences(smoothed, peaks)
+    widths, _, left_ips, right_ips = peak_widths(
+        smoothed, peaks, rel_height=1,
+        prominence_data=(prominences * rel_heights, left_bases, right_bases)
+    )
     
     valid_mask = (widths > 4) & (widths < 50)
-    left_ips = left_ips[valid_mask]
-    right_ips = right_ips[valid_mask]
-    
-    y_result = np.zeros_like(y_pred)
+    left_bounds = np.floor(left_ips[valid_mask]).astype(int)
+    right_bounds = np.ceil(right_ips[valid_mask]).astype(int) + 1
     
-    left_bounds = np.floor(left_ips).astype(int)
-    right_bounds = np.ceil(right_ips).astype(int) + 1
-    
-    for start, end in zip(left_bounds, right_bounds):
-        y_result[start:end] = 1
+    y_result = paint_intervals(len(y_pred), left_bounds, right_bounds).astype(y_pred.dtype)
     
     # Дополнительная проверка: если после всех фильтров остались нули
     # возвращаем результат по порогу
@@ -121,46 +164,232 @@ def find_longest_segment_of_ones(arr):
     return (starts[longest_idx], ends[longest_idx])
 
 
-# Определение устройства для вычислений (GPU или CPU)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# Максимальная длина последовательности, поддерживаемая позиционными эмбеддингами
+MAX_PLIES = 200
+# Шаг скользящего окна для партий длиннее MAX_PLIES
+WINDOW_STRIDE = 100
+# Максимальное число окон в одном прямом проходе трансформера
+MAX_WINDOWS_PER_PASS = 64
 
-# Загрузка предобученной модели Board2Vec
-board2vec = Board2Vec(128, 64)
-board2vec.load_state_dict(torch.load('C:/Users/matvey/workspace/FriflexChess/highlighter/highlighter/checkpoints/board2vec_epoch1.pt', map_location=device))
-board2vec.eval()
 
-# Загрузка предобученной модели BinaryClassifierTransformer
-model = BinaryClassifierTransformer(64).to(device)
-model.load_state_dict(torch.load('C:/Users/matvey/workspace/FriflexChess/highlighter/highlighter/checkpoints/transformer_epoch50.pt', map_location=device))
+def pad_sequences(sequences, max_len=MAX_PLIES):
+    """
+    Упаковывает последовательности эмбеддингов разной длины в один батч.
 
+    Аргументы:
+        sequences: list[np.ndarray] - эмбеддинги партий формы (n_i, dim)
+        max_len: int - максимальная длина, более длинные партии обрезаются
 
-def find_highlight(pgn_path):
+    Возвращает:
+        tuple[torch.Tensor, torch.Tensor, list[int]] - батч (B, L, dim),
+        маска паддинга (B, L) (True - паддинг) и исходные длины партий
     """
-    Находит ключевые моменты в шахматной партии на основе анализа PGN-файла.
+    lengths = [min(len(seq), max_len) for seq in sequences]
+    seq_len = max(lengths)
+    dim = sequences[0].shape[1]
+
+    batch = torch.zeros(len(sequences), seq_len, dim)
+    mask = torch.ones(len(sequences), seq_len, dtype=torch.bool)
+    for i, (seq, length) in enumerate(zip(sequences, lengths)):
+        batch[i, :length] = torch.from_numpy(np.asarray(seq[:length], dtype=np.float32))
+        mask[i, :length] = False
+
+    return batch, mask, lengths
+
+
+def window_starts(length, window=MAX_PLIES, stride=WINDOW_STRIDE):
+    """
+    Возвращает начала окон, покрывающих последовательность длины length.
+    Последнее окно выравнивается по концу, поэтому все окна длинной партии полные.
 
     Аргументы:
-        pgn_path: str - путь к PGN-файлу с партией
-        
+        length: int - длина последовательности
+        window: int - длина окна
+        stride: int - шаг между окнами
+
     Возвращает:
-        tuple[int, int] - временные границы ключевого момента (в полуходах)
+        list[int] - начала окон
     """
-    tensors = pgn_to_tensors(pgn_path, MatrixEncoder())
-    embeds = np.array([board2vec(torch.tensor(x).unsqueeze(0)).detach().numpy() for x in tensors]).reshape((len(tensors), 64))
-    
-    # Паддинг до фиксированной длины
-    if len(tensors) < 200:
-        pad = torch.zeros(200 - len(tensors), embeds.shape[1])
-        embeds = torch.cat([torch.FloatTensor(embeds), pad])
-    else:
-        embeds = torch.FloatTensor(embeds[:200])
-    
-    result = model(torch.tensor(embeds))[0][:len(tensors)].detach().numpy()
-    y_result = inference(result)
+    if length <= window:
+        return [0]
+    starts = list(range(0, length - window, stride))
+    starts.append(length - window)
+    return starts
 
-    start, end = find_longest_segment_of_ones(y_result)
 
-    # print(start, end)
+def score_games(model, embeddings, device=None, window=MAX_PLIES, stride=WINDOW_STRIDE,
+                max_windows=MAX_WINDOWS_PER_PASS):
+    """
+    Вычисляет оценки трансформера для каждого полухода партий любой длины.
+
+    Каждая партия режется на перекрывающиеся окна длины window; окна всех
+    партий прогоняются общими батчами не более max_windows штук, а оценки
+    в перекрытиях усредняются с весами, убывающими к краям окна.
+
+    Аргументы:
+        model - модель BinaryClassifierTransformer
+        embeddings: list[np.ndarray] - эмбеддинги партий формы (n_i, dim)
+        device: torch.device - устройство модели
+        window: int - длина окна (не больше длины позиционных эмбеддингов)
+        stride: int - шаг между окнами
+        max_windows: int - максимальное число окон в одном прямом проходе
+
+    Возвращает:
+        list[np.ndarray] - оценки формы (n_i,) для каждой партии
+    """
+    windows = [
+        (game, start)
+        for game, embeds in enumerate(embeddings)
+        for start in window_starts(len(embeds), window, stride)
+    ]
+    totals = [np.zeros(len(embeds), dtype=np.float32) for embeds in embeddings]
+    weights = [np.zeros(len(embeds), dtype=np.float32) for embeds in embeddings]
+
+    for i in range(0, len(windows), max_windows):
+        chunk = windows[i:i + max_windows]
+        batch, mask, lengths = pad_sequences(
+            [embeddings[game][start:start + window] for game, start in chunk], max_len=window
+        )
+        if device is not None:
+            batch, mask = batch.to(device), mask.to(device)
+        with torch.inference_mode():
+            scores = model(batch, mask).cpu().numpy()
+
+        for (game, start), row, length in zip(chunk, scores, lengths):
+            ramp = np.arange(1, length + 1, dtype=np.float32)
+            weight = np.minimum(ramp, ramp[::-1])
+            totals[game][start:start + length] += row[:length] * weight
+            weights[game][start:start + length] += weight
+
+    return [total / np.maximum(weight, 1e-6) for total, weight in zip(totals, weights)]
+
+
+def scores_to_highlight(scores):
+    """
+    Переводит поэлементные оценки модели в границы ключевого момента.
+
+    Аргументы:
+        scores: np.ndarray - оценки модели для каждого полухода
+
+    Возвращает:
+        dict - {'start': ..., 'end': ...} в номерах ходов
+    """
+    y_result = inference(scores)
+    start, end = find_longest_segment_of_ones(y_result)
     return {
         'start': float(start / 2 + 1),
         'end': float(end / 2 + 1)
-    }
\ No newline at end of file
+    }
+
+
+def highlights_from_tensors(items, batch_size=32):
+    """
+    Находит ключевые моменты для потока уже закодированных партий,
+    обрабатывая их батчами трансформера с маской паддинга.
+
+    Аргументы:
+        items: Iterable[tuple[key, np.ndarray]] - пары (ключ партии, доски (N, 12, 8, 8))
+        batch_size: int - число партий в одном прямом проходе трансформера
+
+    Возвращает:
+        Iterator[tuple[key, dict]] - пары (ключ, {'start': ..., 'end': ...})
+        в порядке входных партий, по мере обработки батчей
+    """
+    registry = get_registry()
+    device = registry.device
+    cache = registry.embedding_cache
+
+    def embed(tensors):
+        board2vec = registry.board2vec
+        if cache is None:
+            return embed_boards(tensors, board2vec, device=device)
+        return cache.embed(tensors, lambda boards: embed_boards(boards, board2vec, device=device))
+
+    def run_batch(keys, embeddings):
+        scores = score_games(registry.transformer, embeddings, device=device)
+        # Кэш сохраняется после каждого батча: потребитель может не дочитать генератор
+        if cache is not None:
+            cache.flush()
+        for key, row in zip(keys, scores):
+            yield key, scores_to_highlight(row)
+
+    keys, embeddings = [], []
+    for key, tensors in items:
+        keys.append(key)
+        embeddings.append(embed(tensors))
+        if len(keys) == batch_size:
+            yield from run_batch(keys, embeddings)
+            keys, embeddings = [], []
+
+    if keys:
+        yield from run_batch(keys, embeddings)
+
+
+def find_highlights(pgn_paths, batch_size=32):
+    """
+    Находит ключевые моменты сразу для многих однопартийных PGN-файлов.
+    Если в реестре включён кэш результатов, уже обработанные партии
+    возвращаются сразу, без обращения к моделям.
+
+    Аргументы:
+        pgn_paths: Iterable[str] - пути к PGN-файлам с партиями
+        batch_size: int - число партий в одном прямом проходе трансформера
+
+    Возвращает:
+        Iterator[tuple[str, dict]] - пары (путь, {'start': ..., 'end': ...});
+        результаты из кэша могут прийти раньше результатов предыдущих партий
+    """
+    encoder = MatrixEncoder()
+    game_cache = get_registry().game_cache
+    pending = []
+
+    def uncached():
+        for pgn_path in pgn_paths:
+            content_hash = None
+            if game_cache is not None:
+                content_hash = pgn_content_hash(pgn_path)
+                cached = game_cache.get(content_hash)
+                if cached is not None:
+                    pending.append((pgn_path, cached))
+                    continue
+            yield (pgn_path, content_hash), pgn_to_tensors(pgn_path, encoder)
+
+    for (pgn_path, content_hash), highlight in highlights_from_tensors(uncached(), batch_size=batch_size):
+        yield from pending
+        pending.clear()
+        if game_cache is not None:
+            game_cache.put(content_hash, highlight)
+        yield pgn_path, highlight
+    yield from pending
+
+
+def find_highlights_in_file(pgn_path, batch_size=32, **kwargs):
+    """
+    Находит ключевые моменты для партий многопартийного PGN-файла,
+    читая его потоково.
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу
+        batch_size: int - число партий в одном прямом проходе трансформера
+        **kwargs - выборка партий (start, stop, shard, num_shards), как у iter_games
+
+    Возвращает:
+        Iterator[tuple[int, dict]] - пары (индекс партии в файле, {'start': ..., 'end': ...})
+    """
+    items = iter_game_tensors(pgn_path, MatrixEncoder(), **kwargs)
+    return highlights_from_tensors(items, batch_size=batch_size)
+
+
+def find_highlight(pgn_path):
+    """
+    Находит ключевые моменты в шахматной партии на основе анализа PGN-файла.
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу с партией
+        
+    Возвращает:
+        dict - временные границы ключевого момента (в ходах)
+    """
+    # Генератор дочитывается до конца, чтобы завершились все его шаги
+    (_, highlight), = find_highlights([pgn_path], batch_size=1)
+    return highlight
@@ -0,0 +1,124 @@
+import os  # Для работы с путями
+import threading  # Для имён временных файлов
+from typing import Iterator, Optional, Tuple
+
+import chess.pgn  # Для работы с PGN файлами шахматных партий
+import numpy as np  # Для хранения индекса смещений
+
+
+INDEX_SUFFIX = '.idx.npy'
+
+
+def index_path_for(pgn_path: str) -> str:
+    """Путь к файлу индекса смещений партий рядом с PGN-файлом."""
+    return pgn_path + INDEX_SUFFIX
+
+
+def scan_offsets(pgn_path: str) -> np.ndarray:
+    """
+    Находит смещения начала всех партий в PGN-файле, не разбирая ходы
+    (читаются только заголовки, тело партии пропускается).
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу
+
+    Возвращает:
+        np.ndarray - смещения партий (int64), пригодные для file.seek
+    """
+    offsets = []
+    with open(pgn_path, encoding='utf-8-sig', errors='replace') as pgn_file:
+        while True:
+            offset = pgn_file.tell()
+            if chess.pgn.read_headers(pgn_file) is None:
+                break
+            offsets.append(offset)
+    return np.array(offsets, dtype=np.int64)
+
+
+def load_offsets(pgn_path: str, rebuild: bool = False) -> np.ndarray:
+    """
+    Возвращает индекс смещений партий, кэшируя его в файле рядом с PGN,
+    чтобы несколько воркеров могли делить один файл без повторного сканирования.
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу
+        rebuild: bool - пересчитать индекс, даже если он уже сохранён
+
+    Возвращает:
+        np.ndarray - смещения партий (int64)
+    """
+    index_path = index_path_for(pgn_path)
+    if (
+        not rebuild
+        and os.path.exists(index_path)
+        and os.path.getmtime(index_path) >= os.path.getmtime(pgn_path)
+    ):
+        return np.load(index_path, mmap_mode='r')
+
+    offsets = scan_offsets(pgn_path)
+    # У каждого процесса и потока свой временный файл: воркеры не перезаписывают
+    # чужой недописанный индекс, а os.replace атомарно подменяет готовый
+    tmp_path = f'{index_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, offsets)
+    os.replace(tmp_path, index_path)
+    return offsets
+
+
+def iter_games(
+    pgn_path: str,
+    start: int = 0,
+    stop: Optional[int] = None,
+    shard: int = 0,
+    num_shards: int = 1,
+    offsets: Optional[np.ndarray] = None,
+) -> Iterator[Tuple[int, chess.pgn.Game]]:
+    """
+    Потоково читает партии из многопартийного PGN-файла.
+
+    Партии с индексами в [start, stop) распределяются между воркерами
+    по остатку от деления индекса на num_shards.
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу
+        start: int - индекс первой партии
+        stop: int | None - индекс, на котором чтение останавливается
+        shard: int - номер текущего воркера
+        num_shards: int - общее число воркеров
+        offsets: np.ndarray | None - индекс смещений (по умолчанию load_offsets)
+
+    Возвращает:
+        Iterator[tuple[int, chess.pgn.Game]] - пары (индекс партии, партия)
+    """
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"Некорректный шард {shard} из {num_shards}")
+
+    if offsets is None:
+        offsets = load_offsets(pgn_path)
+    stop = len(offsets) if stop is None else min(stop, len(offsets))
+
+    with open(pgn_path, encoding='utf-8-sig', errors='replace') as pgn_file:
+        for index in range(start, stop):
+            if index % num_shards != shard:
+                continue
+            pgn_file.seek(int(offsets[index]))
+            game = chess.pgn.read_game(pgn_file)
+            if game is None:
+                break
+            yield index, game
+
+
+def iter_game_tensors(pgn_path: str, encoder, **kwargs) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Потоково кодирует партии многопартийного PGN-файла.
+
+    Аргументы:
+        pgn_path: str - путь к PGN-файлу
+        encoder - кодировщик досок (должен иметь метод encode_game)
+        **kwargs - параметры выборки партий, как у iter_games
+
+    Возвращает:
+        Iterator[tuple[int, np.ndarray]] - пары (индекс партии, доски (N, 12, 8, 8))
+    """
+    for index, game in iter_games(pgn_path, **kwargs):
+        yield index, encoder.encode_game(game.board(), list(game.mainline_moves()))
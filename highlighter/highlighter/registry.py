@@ -0,0 +1,281 @@
+import hashlib  # Для идентификации версий чекпоинтов
+import io  # Для сериализации моделей в памяти
+import os  # Для работы с путями и переменными окружения
+import threading  # Для потокобезопасной ленивой загрузки
+import time  # Для замера времени загрузки
+from typing import Dict, Optional
+
+import torch  # Для работы с PyTorch моделями
+
+from .backends import BACKENDS, OnnxModel, RowwiseModel, int8_paths, onnx_paths, quantize
+from .cache import EmbeddingCache, GameCache
+from .board2vec import Board2Vec  # Модель для преобразования досок в векторы
+from .transformer import BinaryClassifierTransformer
+
+
+# Каталог с чекпоинтами по умолчанию (рядом с пакетом)
+DEFAULT_CHECKPOINTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoints')
+
+# Переменные окружения, через которые можно переопределить расположение моделей
+ENV_CHECKPOINTS_DIR = 'HIGHLIGHTER_CHECKPOINTS_DIR'
+ENV_BOARD2VEC_PATH = 'HIGHLIGHTER_BOARD2VEC_PATH'
+ENV_TRANSFORMER_PATH = 'HIGHLIGHTER_TRANSFORMER_PATH'
+ENV_DEVICE = 'HIGHLIGHTER_DEVICE'
+ENV_WARMUP = 'HIGHLIGHTER_WARMUP'  # '', 'script' или 'compile'
+ENV_BACKEND = 'HIGHLIGHTER_BACKEND'  # 'eager', 'quantized' или 'onnx'
+ENV_CACHE_DIR = 'HIGHLIGHTER_CACHE_DIR'  # Каталог кэшей; если не задан, кэши отключены
+
+BOARD2VEC_FILENAME = 'board2vec_epoch1.pt'
+TRANSFORMER_FILENAME = 'transformer_epoch50.pt'
+
+
+def _model_nbytes(model: torch.nn.Module) -> int:
+    """
+    Оценивает объём весов модели по размеру её сериализованного состояния.
+    В отличие от подсчёта параметров и буферов, учитывает упакованные
+    int8-веса квантованных слоёв.
+
+    Аргументы:
+        model: torch.nn.Module - модель (в том числе TorchScript)
+
+    Возвращает:
+        int - размер в байтах
+    """
+    buffer = io.BytesIO()
+    if isinstance(model, torch.jit.ScriptModule):
+        torch.jit.save(model, buffer)
+    else:
+        torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+class ModelRegistry:
+    """
+    Реестр моделей хайлайтера. Модели загружаются при первом обращении
+    и затем переиспользуются всеми вызовами в рамках процесса.
+
+    Пути к чекпоинтам берутся из аргументов конструктора, затем из
+    переменных окружения, затем из каталога checkpoints рядом с пакетом.
+    """
+
+    def __init__(
+        self,
+        checkpoints_dir: Optional[str] = None,
+        board2vec_path: Optional[str] = None,
+        transformer_path: Optional[str] = None,
+        device: Optional[str] = None,
+        warmup: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        backend: Optional[str] = None,
+    ):
+        """
+        Аргументы:
+            checkpoints_dir: каталог с чекпоинтами
+            board2vec_path: путь к весам Board2Vec (имеет приоритет над каталогом)
+            transformer_path: путь к весам BinaryClassifierTransformer
+            device: устройство для вычислений ('cpu', 'cuda', ...)
+            warmup: режим прогрева - None, 'script' (TorchScript) или 'compile' (torch.compile)
+            cache_dir: каталог кэшей эмбеддингов и результатов (None - кэши отключены)
+            backend: бэкенд инференса - 'eager' (fp32 PyTorch), 'quantized' (int8, CPU)
+                или 'onnx' (ONNX Runtime, CPU; модели создаются python -m highlighter.export)
+        """
+        checkpoints_dir = checkpoints_dir or os.environ.get(ENV_CHECKPOINTS_DIR, DEFAULT_CHECKPOINTS_DIR)
+        self.checkpoints_dir = checkpoints_dir
+        self.board2vec_path = (
+            board2vec_path
+            or os.environ.get(ENV_BOARD2VEC_PATH)
+            or os.path.join(checkpoints_dir, BOARD2VEC_FILENAME)
+        )
+        self.transformer_path = (
+            transformer_path
+            or os.environ.get(ENV_TRANSFORMER_PATH)
+            or os.path.join(checkpoints_dir, TRANSFORMER_FILENAME)
+        )
+
+        backend = backend or os.environ.get(ENV_BACKEND, 'eager')
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд: {backend}")
+        self.backend = backend
+
+        device = device or os.environ.get(ENV_DEVICE)
+        if backend != 'eager':
+            device = "cpu"  # Квантованные и ONNX модели работают только на CPU
+        elif device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+
+        warmup = warmup if warmup is not None else os.environ.get(ENV_WARMUP, '')
+        if warmup not in ('', 'script', 'compile'):
+            raise ValueError(f"Неизвестный режим прогрева: {warmup}")
+        self.warmup = warmup
+
+        self.cache_dir = cache_dir or os.environ.get(ENV_CACHE_DIR)
+
+        self._board2vec = None
+        self._transformer = None
+        self._embedding_cache = None
+        self._game_cache = None
+        self._lock = threading.Lock()
+
+        # Метрики загрузки: имя модели -> значение
+        self.load_seconds: Dict[str, float] = {}
+        self.memory_bytes: Dict[str, int] = {}
+
+    def _load_state(self, model: torch.nn.Module, path: str) -> torch.nn.Module:
+        """Загружает веса в модель и переводит её в режим инференса."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Чекпоинт не найден: {path}")
+        model.load_state_dict(torch.load(path, map_location=self.device))
+        model.to(self.device)
+        model.eval()
+        for p in model.parameters():
+            p.requires_grad_(False)
+        return model
+
+    def _build(self, name: str, index: int, model: torch.nn.Module, path: str):
+        """
+        Загружает модель для выбранного бэкенда и записывает метрики загрузки.
+        Для 'quantized' используется экспортированный int8 TorchScript, если он есть,
+        иначе модель квантуется при загрузке.
+        """
+        started = time.perf_counter()
+        if self.backend == 'onnx':
+            model = OnnxModel(onnx_paths(self.checkpoints_dir)[index])
+            self.load_seconds[name] = time.perf_counter() - started
+            self.memory_bytes[name] = model.nbytes()
+            return model
+
+        int8_path = int8_paths(self.checkpoints_dir)[index]
+        if self.backend == 'quantized' and os.path.exists(int8_path):
+            model = torch.jit.load(int8_path, map_location='cpu')
+            self._record(name, model, started)
+            return model
+
+        model = self._load_state(model, path)
+        if self.backend == 'quantized':
+            model = quantize(model)
+        self._record(name, model, started)
+        return model
+
+    def _warm_up(self, model: torch.nn.Module, *example: torch.Tensor) -> torch.nn.Module:
+        """Опционально компилирует модель и прогоняет пример для прогрева."""
+        if isinstance(model, torch.nn.Module):
+            if self.warmup == 'script':
+                model = torch.jit.trace(model, example)
+                model = torch.jit.freeze(model)
+            elif self.warmup == 'compile':
+                model = torch.compile(model)
+
+        with torch.inference_mode():
+            model(*example)
+
+        # Квантованные модели вызываются построчно, иначе оценки зависят от соседей по батчу
+        if self.backend == 'quantized':
+            model = RowwiseModel(model)
+        return model
+
+    def _record(self, name: str, model: torch.nn.Module, started: float):
+        self.load_seconds[name] = time.perf_counter() - started
+        self.memory_bytes[name] = _model_nbytes(model)
+
+    @property
+    def board2vec(self) -> torch.nn.Module:
+        """Модель Board2Vec, загружаемая при первом обращении."""
+        if self._board2vec is None:
+            with self._lock:
+                if self._board2vec is None:
+                    model = self._build('board2vec', 0, Board2Vec(128, 64), self.board2vec_path)
+                    example = torch.zeros(1, 12, 8, 8, device=self.device)
+                    self._board2vec = self._warm_up(model, example)
+        return self._board2vec
+
+    @property
+    def transformer(self) -> torch.nn.Module:
+        """Модель BinaryClassifierTransformer, загружаемая при первом обращении."""
+        if self._transformer is None:
+            with self._lock:
+                if self._transformer is None:
+                    model = self._build('transformer', 1, BinaryClassifierTransformer(64), self.transformer_path)
+                    example = torch.zeros(1, 200, 64, device=self.device)
+                    mask = torch.zeros(1, 200, dtype=torch.bool, device=self.device)
+                    self._transformer = self._warm_up(model, example, mask)
+        return self._transformer
+
+    def models_version(self, *paths: str) -> str:
+        """
+        Идентификатор чекпоинтов (путь, размер и время изменения файлов).
+
+        Аргументы:
+            paths: пути к чекпоинтам (по умолчанию - все модели реестра)
+        """
+        parts = [self.backend]
+        for path in paths or (self.board2vec_path, self.transformer_path):
+            stat = os.stat(path) if os.path.exists(path) else None
+            parts.append(f'{os.path.abspath(path)}:{stat.st_size if stat else 0}:{stat.st_mtime_ns if stat else 0}')
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+    @property
+    def embedding_cache(self) -> Optional[EmbeddingCache]:
+        """Кэш эмбеддингов позиций или None, если кэши отключены."""
+        if self.cache_dir and self._embedding_cache is None:
+            with self._lock:
+                if self._embedding_cache is None:
+                    self._embedding_cache = EmbeddingCache(os.path.join(
+                        self.cache_dir, 'embeddings', self.models_version(self.board2vec_path)
+                    ))
+        return self._embedding_cache
+
+    @property
+    def game_cache(self) -> Optional[GameCache]:
+        """Кэш результатов партий или None, если кэши отключены."""
+        if self.cache_dir and self._game_cache is None:
+            with self._lock:
+                if self._game_cache is None:
+                    self._game_cache = GameCache(os.path.join(self.cache_dir, 'games'), self.models_version())
+        return self._game_cache
+
+    def load_all(self):
+        """Принудительно загружает все модели (например, при старте воркера)."""
+        self.board2vec
+        self.transformer
+        return self
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Возвращает метрики загруженных моделей.
+
+        Возвращает:
+            dict - {имя модели: {'load_seconds': ..., 'memory_bytes': ...}}
+        """
+        return {
+            name: {
+                'load_seconds': self.load_seconds[name],
+                'memory_bytes': self.memory_bytes[name],
+            }
+            for name in self.load_seconds
+        }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Возвращает общий для процесса реестр моделей, создавая его при первом вызове.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def set_registry(registry: ModelRegistry):
+    """
+    Заменяет общий реестр моделей (например, чтобы указать другие чекпоинты).
+    """
+    global _registry
+    with _registry_lock:
+        _registry = registry
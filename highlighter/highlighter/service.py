@@ -0,0 +1,299 @@
+"""
+HTTP-сервис поиска ключевых моментов с динамическим батчингом запросов.
+
+    python -m highlighter.service --port 8765 --max-batch 32 --max-latency-ms 20
+
+POST /highlight  {"pgn": "<текст PGN>"}  ->  {"start": ..., "end": ...}
+GET  /metrics                            ->  пропускная способность и гистограммы задержек
+GET  /health                             ->  {"status": "ok"}
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import chess.pgn  # Для разбора PGN из тела запроса
+import numpy as np  # Для перцентилей
+
+from .encoder import MatrixEncoder
+from .main import highlights_from_tensors
+from .registry import get_registry
+
+
+class Histogram:
+    """
+    Гистограмма с логарифмическими корзинами (для задержек и размеров батчей).
+    """
+
+    def __init__(self, bounds):
+        """
+        Аргументы:
+            bounds: возрастающие верхние границы корзин; последняя корзина - +inf
+        """
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._recent: List[float] = []
+
+    def observe(self, value: float):
+        index = int(np.searchsorted(self.bounds, value, side='left'))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self._recent.append(value)
+        if len(self._recent) > 10_000:
+            del self._recent[:5_000]
+
+    def snapshot(self) -> dict:
+        recent = np.array(self._recent) if self._recent else np.zeros(1)
+        return {
+            'count': self.total,
+            'mean': self.sum / self.total if self.total else 0.0,
+            'p50': float(np.percentile(recent, 50)),
+            'p95': float(np.percentile(recent, 95)),
+            'p99': float(np.percentile(recent, 99)),
+            'buckets': {
+                **{f'le_{bound:g}': count for bound, count in zip(self.bounds, self.counts)},
+                'le_inf': self.counts[-1],
+            },
+        }
+
+
+LATENCY_BOUNDS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+BATCH_BOUNDS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class Overloaded(Exception):
+    """Очередь запросов заполнена."""
+
+
+class MicroBatcher:
+    """
+    Собирает одновременные запросы в батчи: батч отправляется в модель, когда
+    набралось max_batch партий или первый запрос ждёт дольше max_latency.
+    Ограниченная очередь обеспечивает обратное давление: лишние запросы
+    отклоняются сразу, а не копятся в памяти.
+    """
+
+    def __init__(self, max_batch: int = 32, max_latency: float = 0.02, max_queue: int = 256):
+        """
+        Аргументы:
+            max_batch: максимальное число партий в батче
+            max_latency: максимальное ожидание добора батча, секунды
+            max_queue: максимальное число ожидающих запросов
+        """
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue: "asyncio.Queue[Tuple[np.ndarray, asyncio.Future]]" = asyncio.Queue(maxsize=max_queue)
+        # Один поток для моделей: батчи выполняются последовательно
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='highlighter-model')
+        self.batch_sizes = Histogram(BATCH_BOUNDS)
+        self.batch_ms = Histogram(LATENCY_BOUNDS_MS)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, tensors: np.ndarray) -> dict:
+        """Ставит партию в очередь и ждёт результат."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((tensors, future))
+        except asyncio.QueueFull:
+            raise Overloaded()
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            items = [(i, tensors) for i, (tensors, _) in enumerate(batch)]
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, lambda: list(highlights_from_tensors(items, batch_size=len(items)))
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batch_sizes.observe(len(batch))
+            self.batch_ms.observe((time.perf_counter() - started) * 1000)
+            for i, highlight in results:
+                future = batch[i][1]
+                if not future.done():
+                    future.set_result(highlight)
+
+
+def encode_pgn_text(pgn_text: str, encoder: MatrixEncoder) -> np.ndarray:
+    """Кодирует первую партию из текста PGN в массив досок (N, 12, 8, 8)."""
+    game = chess.pgn.read_game(io.StringIO(pgn_text))
+    if game is None:
+        raise ValueError("PGN не содержит партий")
+    return encoder.encode_game(game.board(), list(game.mainline_moves()))
+
+
+class HighlightService:
+    """
+    Минимальный HTTP/1.1 сервер на asyncio поверх MicroBatcher.
+    """
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+        self.encoder = MatrixEncoder()
+        self.latency_ms = Histogram(LATENCY_BOUNDS_MS)
+        self.started = time.monotonic()
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def metrics(self) -> dict:
+        uptime = time.monotonic() - self.started
+        return {
+            'uptime_seconds': uptime,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'throughput_rps': self.completed / uptime if uptime else 0.0,
+            'queue_depth': self.batcher.queue.qsize(),
+            'latency_ms': self.latency_ms.snapshot(),
+            'batch_size': self.batcher.batch_sizes.snapshot(),
+            'batch_ms': self.batcher.batch_ms.snapshot(),
+            'models': get_registry().metrics(),
+        }
+
+    async def highlight(self, body: bytes) -> Tuple[int, dict]:
+        started = time.perf_counter()
+        try:
+            request = json.loads(body)
+            tensors = await asyncio.get_running_loop().run_in_executor(
+                None, encode_pgn_text, request['pgn'], self.encoder
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            self.failed += 1
+            return 400, {'error': f'Некорректный запрос: {e}'}
+
+        try:
+            result = await self.batcher.submit(tensors)
+        except Overloaded:
+            self.rejected += 1
+            return 503, {'error': 'Сервис перегружен, повторите позже'}
+        except Exception as e:
+            self.failed += 1
+            return 500, {'error': str(e)}
+
+        self.completed += 1
+        self.latency_ms.observe((time.perf_counter() - started) * 1000)
+        return 200, result
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        if method == 'POST' and path == '/highlight':
+            return await self.highlight(body)
+        if method == 'GET' and path == '/metrics':
+            return 200, self.metrics()
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': 'Not found'}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, payload = await self.route(method, path, body)
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+                    f'Content-Type: application/json; charset=utf-8\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, max_batch: int = 32,
+                max_latency_ms: float = 20, max_queue: int = 256):
+    """
+    Запускает сервис и обслуживает запросы до отмены.
+
+    Аргументы:
+        host: адрес для прослушивания
+        port: порт
+        max_batch: максимальное число партий в батче
+        max_latency_ms: максимальное ожидание добора батча, миллисекунды
+        max_queue: максимальное число ожидающих запросов
+    """
+    # Модели загружаются до приёма запросов, чтобы первый запрос не платил за загрузку
+    await asyncio.get_running_loop().run_in_executor(None, get_registry().load_all)
+
+    batcher = MicroBatcher(max_batch, max_latency_ms / 1000, max_queue)
+    batcher.start()
+    service = HighlightService(batcher)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f'Сервис слушает http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=20)
+    parser.add_argument('--max-queue', type=int, default=256)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_latency_ms, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
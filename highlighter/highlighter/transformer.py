@@ -71,12 +71,14 @@ class BinaryClassifierTransformer(nn.Module):
             if p.dim() > 1:  # Инициализируем только тензоры с размерностью больше 1
                 init.xavier_uniform_(p)
     
-    def forward(self, x):
+    def forward(self, x, padding_mask=None):
         """
         Прямой проход модели.
         
         Параметры:
         - x: Входные данные размерности [batch_size, seq_len, input_dim].
+        - padding_mask: Булева маска [batch_size, seq_len], True - позиции паддинга,
+          которые механизм внимания должен игнорировать (по умолчанию None).
         
         Возвращает:
         - output: Вероятности классов размерности [batch_size, seq_len].
@@ -88,7 +90,7 @@ class BinaryClassifierTransformer(nn.Module):
         x = x + self.pos_encoder[:, :x.size(1), :]  # Добавляем позиционные эмбеддинги
         
         # 3. Пропуск данных через TransformerEncoder
-        x = self.transformer(x)  # [batch_size, seq_len, d_model]
+        x = self.transformer(x, src_key_padding_mask=padding_mask)  # [batch_size, seq_len, d_model]
         
         # 4. Классификация и применение сигмоиды
         return torch.sigmoid(self.classifier(x)).squeeze(-1)  # [batch_size, seq_len]
\ No newline at end of file
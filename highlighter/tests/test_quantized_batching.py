@@ -0,0 +1,78 @@
+import random
+
+import chess.pgn
+import numpy as np
+import pytest
+import torch
+
+from highlighter import registry as registry_module
+from highlighter.board2vec import Board2Vec
+from highlighter.encoder import MatrixEncoder
+from highlighter.main import embed_boards, find_highlight, find_highlights, pgn_to_tensors, score_games
+from highlighter.registry import BOARD2VEC_FILENAME, TRANSFORMER_FILENAME, ModelRegistry, set_registry
+from highlighter.transformer import BinaryClassifierTransformer
+
+
+def write_game(path, n_plies, seed):
+    rng = random.Random(seed)
+    game = chess.pgn.Game()
+    node, board = game, game.board()
+    for _ in range(n_plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        node = node.add_variation(move)
+        board.push(move)
+    path.write_text(str(game))
+    return str(path)
+
+
+@pytest.fixture
+def quantized_registry(tmp_path):
+    torch.manual_seed(0)
+    torch.save(Board2Vec(128, 64).state_dict(), tmp_path / BOARD2VEC_FILENAME)
+    torch.save(BinaryClassifierTransformer(64).state_dict(), tmp_path / TRANSFORMER_FILENAME)
+
+    previous = registry_module._registry
+    registry = ModelRegistry(checkpoints_dir=str(tmp_path), backend='quantized')
+    set_registry(registry)
+    yield registry
+    set_registry(previous)
+
+
+@pytest.fixture
+def pgn_paths(tmp_path):
+    return [write_game(tmp_path / f'game_{i}.pgn', 30 + 40 * i, seed=i) for i in range(5)]
+
+
+def test_quantized_scores_do_not_depend_on_batch(quantized_registry, pgn_paths):
+    encoder = MatrixEncoder()
+    tensors = [pgn_to_tensors(path, encoder) for path in pgn_paths]
+
+    embeddings = [embed_boards(t, quantized_registry.board2vec) for t in tensors]
+    for t, batched in zip(tensors, embeddings):
+        single = np.concatenate([embed_boards(t[i:i + 1], quantized_registry.board2vec) for i in range(len(t))])
+        np.testing.assert_array_equal(batched, single)
+
+    batched_scores = score_games(quantized_registry.transformer, embeddings)
+    for e, batched in zip(embeddings, batched_scores):
+        np.testing.assert_array_equal(batched, score_games(quantized_registry.transformer, [e])[0])
+
+
+def test_quantized_highlights_do_not_depend_on_batch(quantized_registry, pgn_paths):
+    batched = dict(find_highlights(pgn_paths, batch_size=len(pgn_paths)))
+    assert batched == {path: find_highlight(path) for path in pgn_paths}
+
+
+def test_quantized_memory_includes_packed_weights(quantized_registry):
+    model = quantized_registry.transformer.model
+    tensors = list(model.parameters()) + list(model.buffers())
+    plain_bytes = sum(t.numel() * t.element_size() for t in tensors)
+    # Упакованные int8-веса не входят в parameters() и buffers()
+    packed_bytes = sum(
+        module.weight().numel()
+        for module in model.modules() if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+    )
+    assert packed_bytes > 0
+    assert quantized_registry.metrics()['transformer']['memory_bytes'] >= plain_bytes + packed_bytes
@@ -46,35 +46,45 @@ overlay_audio_on_video(
 
 import json
 import os
-from tts import setup_translation_models, smart_translate, TTSEngine, setup_environment, create_output_dir
+from tts import setup_translation_models, translate_fanout, ParallelTTS, setup_environment, create_output_dir
 
-# Инициализация
-setup_environment()
-output_dir = create_output_dir()
 
 # Загрузка комментариев (внешний код)
 def load_comments(json_path):
     with open(json_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-rus_comments = load_comments("rus_comments.json")
-
-# Перевод
-setup_translation_models()
-all_comments = {"ru": rus_comments}
-for lang in ["en", "fr", "es", "de", "hi"]:
-    all_comments[lang] = {
-        key: smart_translate(txt, "ru", lang)
-        for key, txt in rus_comments.items()
-    }
-
-# Сохранение переводов
-with open(os.path.join(output_dir, "comments_translated.json"), "w", encoding="utf-8") as fp:
-    json.dump(all_comments, fp, ensure_ascii=False, indent=2)
-
-# Синтез речи
-tts = TTSEngine()
-for lang, comments in all_comments.items():
-    for key, txt in comments.items():
-        out_path = os.path.join(output_dir, f"{lang}_{key}.wav")
-        tts.synthesize(txt, lang, out_path)
\ No newline at end of file
+
+def main():
+    # Инициализация
+    setup_environment()
+    output_dir = create_output_dir()
+
+    rus_comments = load_comments("rus_comments.json")
+
+    # Перевод
+    setup_translation_models()
+    translations, timings = translate_fanout(rus_comments, "ru", ["en", "fr", "es", "de", "hi"])
+    all_comments = {"ru": rus_comments, **translations}
+    print("Время перевода:", {lang: round(seconds, 2) for lang, seconds in timings.items()})
+
+    # Сохранение переводов
+    with open(os.path.join(output_dir, "comments_translated.json"), "w", encoding="utf-8") as fp:
+        json.dump(all_comments, fp, ensure_ascii=False, indent=2)
+
+    # Синтез речи: языки синтезируются параллельно в отдельных процессах
+    with ParallelTTS(languages=list(all_comments)) as tts:
+        tts.synthesize_batch([
+            (txt, lang, os.path.join(output_dir, f"{lang}_{key}.wav"))
+            for lang, comments in all_comments.items()
+            for key, txt in comments.items()
+        ])
+        synthesis = {}
+        for worker_timings in tts.timings.values():
+            synthesis.update(worker_timings["synthesis_seconds"])
+        print("Время синтеза:", {lang: round(seconds, 2) for lang, seconds in synthesis.items()})
+
+
+# Воркеры ParallelTTS запускаются через spawn и заново импортируют этот модуль
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
-from .slice_by_moves import extract_segments_by_move
\ No newline at end of file
+from .slice_by_moves import extract_segments_by_move, get_timecode
+from .timeline import MoveTimeline, load_timeline
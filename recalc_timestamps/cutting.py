@@ -0,0 +1,101 @@
+import os
+import tempfile
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from video_processing.ffmpeg import (
+    concat_copy, copy_segment, encode_segment, probe_keyframes, probe_video, x264_stream_args
+)
+
+# Куски короче этого не копируются, а перекодируются вместе с границей
+MIN_COPY_SECONDS = 0.5
+
+
+class Piece(NamedTuple):
+    """Кусок итогового видео: [start, end) исходника и способ его получения."""
+    start: float
+    end: float
+    copy: bool
+
+
+def merge_ranges(ranges: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Объединяет пересекающиеся и соприкасающиеся отрезки, сохраняя порядок."""
+    merged = []
+    for start, end in ranges:
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1] + 1e-6 and start >= merged[-1][0]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_cuts(ranges: Sequence[Tuple[float, float]], keyframes: np.ndarray) -> List[Piece]:
+    """
+    Разбивает отрезки на куски: внутренняя часть между ключевыми кадрами
+    копируется, а неполные GOP на границах перекодируются.
+
+    Args:
+        ranges: отрезки исходного видео (start, end) в секундах
+        keyframes: отсортированные времена ключевых кадров
+
+    Returns:
+        Список кусков в порядке склейки
+    """
+    pieces = []
+    for start, end in merge_ranges(ranges):
+        # Первый ключевой кадр не раньше start и последний не позже end
+        first = np.searchsorted(keyframes, start - 1e-6, side="left")
+        last = np.searchsorted(keyframes, end + 1e-6, side="right") - 1
+        if first >= len(keyframes) or last < first or keyframes[last] - keyframes[first] < MIN_COPY_SECONDS:
+            pieces.append(Piece(start, end, False))
+            continue
+
+        copy_start, copy_end = float(keyframes[first]), float(keyframes[last])
+        if copy_start > start:
+            pieces.append(Piece(start, copy_start, False))
+        pieces.append(Piece(copy_start, copy_end, True))
+        if end > copy_end:
+            pieces.append(Piece(copy_end, end, False))
+    return pieces
+
+
+def cut_ranges(in_video: str, out_video: str, ranges: Sequence[Tuple[float, float]], tmp_dir: str = None) -> List[Piece]:
+    """
+    Вырезает и склеивает отрезки исходного видео, перекодируя только
+    границы, не совпадающие с ключевыми кадрами. Звук не сохраняется.
+
+    Если исходник не в H.264 или его профиль нельзя повторить в libx264,
+    скопированные и перекодированные куски не склеить, и все куски перекодируются.
+
+    Args:
+        in_video: путь к исходному видео
+        out_video: путь для сохранения результата
+        ranges: отрезки (start, end) в секундах
+        tmp_dir: каталог для временных кусков (по умолчанию - системный)
+
+    Returns:
+        План склейки (для логирования и отладки)
+    """
+    info = probe_video(in_video)
+    ranges = [(max(0.0, start), min(end, info.duration)) for start, end in ranges]
+    if x264_stream_args(info) is not None:
+        pieces = plan_cuts(ranges, probe_keyframes(in_video))
+    else:
+        pieces = [Piece(start, end, False) for start, end in merge_ranges(ranges)]
+    if not pieces:
+        raise ValueError("Нет отрезков для вырезания")
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as workdir:
+        paths = []
+        for i, piece in enumerate(pieces):
+            path = os.path.join(workdir, f"piece_{i:04d}.ts")
+            if piece.copy:
+                copy_segment(in_video, piece.start, piece.end, path)
+            else:
+                encode_segment(in_video, piece.start, piece.end, path, info)
+            paths.append(path)
+        concat_copy(paths, out_video)
+    return pieces
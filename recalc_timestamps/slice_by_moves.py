@@ -1,52 +1,21 @@
-from moviepy import VideoFileClip, concatenate_videoclips
-from moviepy.video.VideoClip import ColorClip
-import json
+from .cutting import cut_ranges
+from .timeline import MoveTimeline, load_timeline
 
-def extract_segments_by_move(ts_path: str, in_video: str, out_video: str, start, end):
-    with open(ts_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+def extract_segments_by_move(ts_path, in_video: str, out_video: str, start, end):
+    # ts_path - путь к JSON с таймкодами или уже построенный MoveTimeline
+    timeline = ts_path if isinstance(ts_path, MoveTimeline) else load_timeline(ts_path)
 
-    clip = VideoFileClip(in_video)
-    total = clip.duration
-    
-    result = ColorClip(size=clip.size, color=(0, 0, 0), duration=0.1)
+    smove, emove = timeline.move_range(start, end)
+    if emove == smove:
+        raise ValueError(f"Нет ходов в диапазоне [{start}, {end}]")
 
-    smove = max(0, int(start * 2 - 1))
-    emove = max(smove, min(int(end * 2), len(data)))
+    # Отрезки ходов вырезаются копированием потока, перекодируются только границы
+    ranges = timeline.timecodes(smove, emove)
+    cut_ranges(in_video, out_video, ranges.tolist())
 
-    for move in range(smove, emove):
-        stime, etime = get_timecode(ts_path, move)
-        print(stime, etime)
-
-        start = max(0.0, min(float(stime), total))
-        end   = max(stime, min(float(etime), total))
-
-        segment = clip.subclipped(start, end)
-        # result = concatenate_videoclips(
-        #     [result, segment],
-        #     method="compose")
-        # segment.close()
-
-    result.write_videofile(
-        out_video,
-        codec="libx264",
-        audio=False,
-        ffmpeg_params=["-movflags", "+faststart"]
-    )
-    result.close()
-    clip.close()
-
-    return get_timecode(ts_path, moves_range[0][0])[0], \
-        get_timecode(ts_path, moves_range[-1][-1])[1]
+    return float(ranges[0, 0]), float(ranges[-1, 1])
 
 
 
 def get_timecode(ts_path: str, move):
-    with open(ts_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    result, _move = 0, min(len(data), move) 
-    for id in range(_move):
-        result += data[id]["end_ts"] - data[id]["start_ts"]
-
-    return result / 1000, (result + data[_move]["fragment_before_ts"]) / 1000
\ No newline at end of file
+    return load_timeline(ts_path).timecode(move)
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+import numpy as np
+
+
+class MoveTimeline:
+    """
+    Индекс времён ходов из JSON-файла с таймкодами.
+
+    Файл читается один раз; по длительностям фрагментов (end_ts - start_ts)
+    строятся префиксные суммы, поэтому время хода находится за O(1),
+    а ход по времени - бинарным поиском за O(log n). Времена в секундах.
+    """
+
+    def __init__(self, moves: List[dict]):
+        """
+        Args:
+            moves: список ходов со значениями start_ts, end_ts и fragment_before_ts (мс)
+        """
+        if not moves:
+            raise ValueError("Список ходов пуст")
+        self.start_ts = np.array([move["start_ts"] for move in moves], dtype=np.float64)
+        self.end_ts = np.array([move["end_ts"] for move in moves], dtype=np.float64)
+        self.fragment_before_ts = np.array([move["fragment_before_ts"] for move in moves], dtype=np.float64)
+
+        # offsets[i] - начало фрагмента хода i, offsets[-1] - общая длительность
+        self.offsets = np.zeros(len(moves) + 1, dtype=np.float64)
+        np.cumsum(self.end_ts - self.start_ts, out=self.offsets[1:])
+        # Момент самого хода внутри своего фрагмента
+        self.move_times = self.offsets[:-1] + self.fragment_before_ts
+
+    @classmethod
+    def from_json(cls, ts_path: str) -> "MoveTimeline":
+        with open(ts_path, 'r', encoding='utf-8') as file:
+            return cls(json.load(file))
+
+    def __len__(self) -> int:
+        return len(self.start_ts)
+
+    @property
+    def duration(self) -> float:
+        return float(self.offsets[-1]) / 1000
+
+    def timecode(self, move: int) -> Tuple[float, float]:
+        """Начало фрагмента хода и момент хода, в секундах."""
+        move = min(max(move, 0), len(self) - 1)
+        return float(self.offsets[move]) / 1000, float(self.move_times[move]) / 1000
+
+    def timecodes(self, start_move: int, end_move: int) -> np.ndarray:
+        """Массив (k, 2) таймкодов ходов [start_move, end_move)."""
+        moves = np.clip(np.arange(start_move, end_move), 0, len(self) - 1)
+        return np.stack([self.offsets[moves], self.move_times[moves]], axis=1) / 1000
+
+    def ply_at(self, seconds: float) -> int:
+        """Номер хода, фрагмент которого содержит указанный момент времени."""
+        index = int(np.searchsorted(self.offsets, seconds * 1000, side='right')) - 1
+        return min(max(index, 0), len(self) - 1)
+
+    def move_range(self, start, end) -> Tuple[int, int]:
+        """
+        Полуинтервал ходов [smove, emove) для момента партии из find_highlight
+        (start и end - номера полных ходов).
+        """
+        smove = max(0, int(start * 2 - 1))
+        emove = max(smove, min(int(end * 2), len(self)))
+        return smove, emove
+
+
+# Разобранные таймлайны: путь -> (mtime, MoveTimeline); не больше MAX_CACHED_TIMELINES путей
+MAX_CACHED_TIMELINES = 128
+_timelines: "OrderedDict[str, Tuple[float, MoveTimeline]]" = OrderedDict()
+_timelines_lock = threading.Lock()
+
+
+def load_timeline(ts_path: str) -> MoveTimeline:
+    """Возвращает MoveTimeline для файла; повторно файл читается только после изменения."""
+    path, mtime = os.path.abspath(ts_path), os.path.getmtime(ts_path)
+    with _timelines_lock:
+        cached = _timelines.get(path)
+        if cached is not None and cached[0] == mtime:
+            _timelines.move_to_end(path)
+            return cached[1]
+        # Запись для изменившегося файла заменяется, самые старые пути вытесняются
+        timeline = MoveTimeline.from_json(ts_path)
+        _timelines[path] = (mtime, timeline)
+        _timelines.move_to_end(path)
+        while len(_timelines) > MAX_CACHED_TIMELINES:
+            _timelines.popitem(last=False)
+    return timeline
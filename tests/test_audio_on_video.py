@@ -0,0 +1,65 @@
+import wave
+
+import numpy as np
+import pytest
+from moviepy import AudioFileClip, ColorClip, VideoFileClip
+
+from video_processing.audio_on_video import load_audio_clip, overlay_audio_on_video
+
+SAMPLE_RATE = 44100
+
+
+def tone(seconds, freq=440.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.2 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@pytest.fixture
+def source_video(tmp_path, monkeypatch):
+    # overlay_audio_on_video пишет временный звук в текущий каталог
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'source.mp4')
+    ColorClip((64, 64), color=(0, 0, 0), duration=2).with_fps(10).write_videofile(
+        path, codec='libx264', audio=False, logger=None
+    )
+    return path
+
+
+def assert_has_audio(path, duration):
+    clip = VideoFileClip(path)
+    try:
+        assert clip.audio is not None
+        assert clip.duration == pytest.approx(duration, abs=0.2)
+        assert np.abs(clip.audio.to_soundarray(fps=SAMPLE_RATE)).max() > 0.05
+    finally:
+        clip.close()
+
+
+def test_overlay_in_memory_audio(source_video, tmp_path):
+    output = str(tmp_path / 'out.mp4')
+    overlay_audio_on_video(source_video, (tone(1.0), SAMPLE_RATE), 0.5, output)
+    assert_has_audio(output, 2)
+
+
+def test_overlay_audio_file(source_video, tmp_path):
+    wav_path = str(tmp_path / 'tone.wav')
+    with wave.open(wav_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes((tone(1.0) * 32767).astype(np.int16).tobytes())
+
+    output = str(tmp_path / 'out.mp4')
+    overlay_audio_on_video(source_video, wav_path, 0.5, output)
+    assert_has_audio(output, 2)
+
+
+def test_overlay_rejects_audio_past_the_end(source_video, tmp_path):
+    with pytest.raises(ValueError):
+        overlay_audio_on_video(source_video, (tone(1.0), SAMPLE_RATE), 1.5, str(tmp_path / 'out.mp4'))
+
+
+def test_load_audio_clip_from_buffer():
+    clip = load_audio_clip((tone(0.5), SAMPLE_RATE))
+    assert clip.duration == pytest.approx(0.5)
+    assert clip.nchannels == 2
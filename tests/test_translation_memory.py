@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+from argostranslate import translate
+
+from tts.translator import TranslationEngine, TranslationMemory, split_segments, split_sentences
+
+TEXTS = [
+    'Белые начинают с e4. Черные отвечают симметрично!\nНа двадцатом ходу конь прыгает на f5.',
+    'Первый абзац.\n\nВторой абзац после пустой строки? Да.',
+    'Черные отвечают симметрично! Партия завершается матом.',
+    'Без точки в конце',
+    '',
+]
+
+
+class FakeTokenizer:
+    # Как sentencepiece: каждое слово - токен с «▁» вместо пробела перед ним
+    def encode(self, sentence):
+        return [f'▁{word}' for word in sentence.split()]
+
+    def decode(self, tokens):
+        return ''.join(tokens).replace('▁', ' ')
+
+
+class FakeTranslator:
+    def translate_batch(self, tokenized, target_prefix=None, **kwargs):
+        return [SimpleNamespace(hypotheses=[[token.upper() for token in tokens]]) for tokens in tokenized]
+
+
+def fake_translation():
+    package_translation = object.__new__(translate.PackageTranslation)
+    package_translation.from_lang = package_translation.to_lang = None
+    package_translation.pkg = SimpleNamespace(tokenizer=FakeTokenizer(), target_prefix='')
+    package_translation.translator = FakeTranslator()
+    package_translation.sentencizer = SimpleNamespace(split_sentences=split_sentences)
+    return translate.CachedTranslation(package_translation)
+
+
+def make_engine(monkeypatch, memory=None):
+    engine = TranslationEngine(memory=memory)
+    translation = fake_translation()
+    monkeypatch.setattr(engine, 'chain', lambda frm, to: [translation])
+    monkeypatch.setattr(engine, 'installed_pairs', lambda: {('ru', 'en'): '1.0'})
+    return engine
+
+
+@pytest.mark.parametrize('text', TEXTS + ['  Ведущие пробелы.  Двойной пробел.\n'])
+def test_split_segments_keeps_separators(text):
+    lead, segments = split_segments(text)
+    assert lead + ''.join(sentence + separator for sentence, separator in segments) == text
+
+
+def test_memory_does_not_change_output(monkeypatch, tmp_path):
+    expected = make_engine(monkeypatch).translate_many(TEXTS, 'ru', 'en')
+
+    memory = TranslationMemory(str(tmp_path / 'memory.sqlite'))
+    engine = make_engine(monkeypatch, memory)
+    assert engine.translate_many(TEXTS, 'ru', 'en') == expected
+    # Второй проход целиком из памяти
+    assert engine.translate_many(TEXTS, 'ru', 'en') == expected
+    assert memory.stats()['hits'] > 0
+    assert expected[1].count('\n') == 2
@@ -1,3 +1,5 @@
-from .translator import setup_translation_models, smart_translate
-from .tts import TTSEngine
+from .translator import setup_translation_models, smart_translate, translate_fanout, TranslationEngine, TranslationMemory
+from .tts import TTSEngine, AudioBuffer
+from .parallel import ParallelTTS
+from .cache import SpeechCache
 from .utils import setup_environment, create_output_dir
\ No newline at end of file
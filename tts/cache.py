@@ -0,0 +1,127 @@
+import argparse
+import hashlib
+import os
+import re
+import threading
+
+import numpy as np
+
+# Каталог кэша синтезированной речи по умолчанию (если задан, кэш включается)
+CACHE_DIR_ENV = 'TTS_CACHE_DIR'
+
+_spaces_re = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    return _spaces_re.sub(' ', text).strip()
+
+
+class SpeechCache:
+    """
+    Дисковый кэш синтезированной речи. Ключ - хэш от (нормализованный текст,
+    язык, голос, частота дискретизации, версия модели); значение - PCM float32
+    вместе с частотой дискретизации в отдельном .npz файле.
+
+    Размер кэша ограничен max_bytes: при превышении удаляются записи,
+    к которым дольше всего не обращались (время доступа хранится в mtime).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 2**30):
+        """
+        Args:
+            cache_dir: каталог кэша
+            max_bytes: максимальный суммарный размер записей
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.name.endswith('.npz'))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, lang: str, speaker: str, sample_rate: int, model_version: str) -> str:
+        payload = '\x1f'.join([normalize_text(text), lang, speaker, str(sample_rate), model_version])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def get(self, key: str):
+        """Возвращает (samples, sample_rate) или None."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                samples, sample_rate = data['samples'], int(data['sample_rate'])
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return samples, sample_rate
+
+    def put(self, key: str, samples: np.ndarray, sample_rate: int):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, samples=np.asarray(samples, dtype=np.float32), sample_rate=sample_rate)
+        size = os.path.getsize(tmp_path)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.cache_dir) if entry.name.endswith('.npz')
+        )
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'size_bytes': self._size,
+        }
+
+
+def main():
+    # Предварительный синтез списка фраз: python -m tts.cache phrases.txt --langs ru en
+    # Фразы режутся на предложения так же, как при синтезе, поэтому каждое
+    # предложение потом находится в кэше внутри любого текста
+    parser = argparse.ArgumentParser(description='Прогрев кэша синтезированной речи')
+    parser.add_argument('phrases', help='файл с фразами, по одной на строку')
+    parser.add_argument('--langs', nargs='+', default=['ru'])
+    parser.add_argument('--cache-dir', default=os.environ.get(CACHE_DIR_ENV, 'tts_cache'))
+    args = parser.parse_args()
+
+    from .tts import TTSEngine
+
+    with open(args.phrases, encoding='utf-8') as f:
+        phrases = [line.strip() for line in f if line.strip()]
+
+    engine = TTSEngine(cache=SpeechCache(args.cache_dir))
+    for lang in args.langs:
+        engine.synthesize_batch([(phrase, lang, None) for phrase in phrases])
+    print(engine.cache.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import os
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Движок TTS внутри процесса-воркера
+_engine = None
+
+
+def _init_worker(cpus, num_threads, languages, engine_kwargs):
+    global _engine
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    from .tts import TTSEngine
+    _engine = TTSEngine(preload=languages, num_threads=num_threads, **engine_kwargs)
+
+
+def _synthesize_batch(items, return_audio):
+    return _engine.synthesize_batch(items, return_audio=return_audio), _engine.timings()
+
+
+class ParallelTTS:
+    """
+    Параллельный синтез речи: языки распределяются между процессами-воркерами,
+    каждый со своими загруженными моделями, бюджетом потоков и набором ядер CPU.
+
+    Каждый воркер - отдельный пул из одного процесса, поэтому язык всегда
+    синтезируется в одном и том же процессе и модель остаётся «тёплой».
+    """
+
+    def __init__(self, languages, num_workers=None, threads_per_worker=None, pin_cpus=True, **engine_kwargs):
+        """
+        Args:
+            languages: языки, которые будут синтезироваться
+            num_workers: число процессов (по умолчанию - по одному на язык, не больше числа ядер)
+            threads_per_worker: потоков torch на процесс (по умолчанию ядра делятся поровну)
+            pin_cpus: закреплять процессы за непересекающимися наборами ядер (Linux)
+            engine_kwargs: параметры TTSEngine (model_dir, max_models, ...)
+        """
+        languages = list(OrderedDict.fromkeys(languages))
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+
+        num_workers = num_workers or min(len(languages), len(cpus))
+        num_workers = max(1, min(num_workers, len(languages)))
+        threads_per_worker = threads_per_worker or max(1, len(cpus) // num_workers)
+
+        self.worker_of = {lang: i % num_workers for i, lang in enumerate(languages)}
+        self.timings = {}
+
+        context = mp.get_context('spawn')
+        self._pools = []
+        for worker in range(num_workers):
+            worker_cpus = None
+            if pin_cpus:
+                worker_cpus = cpus[worker * threads_per_worker:(worker + 1) * threads_per_worker] or None
+            worker_langs = [lang for lang, w in self.worker_of.items() if w == worker]
+            self._pools.append(ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(worker_cpus, threads_per_worker, worker_langs, engine_kwargs),
+            ))
+
+    def synthesize_batch(self, items, return_audio=False):
+        """
+        Синтезирует тексты параллельно по языкам.
+
+        Args:
+            items: список кортежей (text, lang, out_wav)
+            return_audio: вернуть AudioBuffer (48 кГц) вместо длительностей
+
+        Returns:
+            Список длительностей (в секундах) или AudioBuffer в порядке items
+        """
+        by_worker = OrderedDict()
+        for index, (text, lang, out_wav) in enumerate(items):
+            if lang not in self.worker_of:
+                raise ValueError(f"Язык {lang} не был указан при создании ParallelTTS")
+            by_worker.setdefault(self.worker_of[lang], []).append((index, (text, lang, out_wav)))
+
+        futures = {
+            worker: self._pools[worker].submit(_synthesize_batch, [item for _, item in group], return_audio)
+            for worker, group in by_worker.items()
+        }
+
+        results = [None] * len(items)
+        for worker, future in futures.items():
+            worker_results, timings = future.result()
+            self.timings[worker] = timings
+            for (index, _), result in zip(by_worker[worker], worker_results):
+                results[index] = result
+        return results
+
+    def close(self):
+        for pool in self._pools:
+            pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
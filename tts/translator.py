@@ -1,42 +1,463 @@
-from argostranslate import package, translate
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def setup_translation_models(target_langs=["en", "fr", "es", "de", "hi"]):
+import ctranslate2
+from argostranslate import package, settings, translate
+
+# Каталог с файлами *.argosmodel для установки моделей без сети
+MODEL_DIR_ENV = 'ARGOS_MODEL_DIR'
+PIVOT_LANG = 'en'
+
+# Файл памяти переводов (если задан, память включается)
+MEMORY_PATH_ENV = 'TRANSLATION_MEMORY_PATH'
+
+_model_name_re = re.compile(r'translate-([a-z]+)_([a-z]+)')
+_sentence_re = re.compile(r'(?<=[.!?…।])\s+')
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _sentence_re.split(text) if sentence.strip()]
+
+
+def split_segments(text, split=split_sentences):
+    """
+    Делит текст на предложения, сохраняя исходные разделители между ними.
+
+    Абзацы (строки) делятся функцией split по отдельности, как в argostranslate,
+    а каждое предложение находится в исходном тексте, чтобы взять пробелы
+    и переводы строк после него как есть.
+
+    Args:
+        text: исходный текст
+        split: функция, делящая абзац на предложения
+
+    Returns:
+        Кортеж (ведущие пробелы, [(предложение, разделитель после него)]);
+        склейка ведущих пробелов и всех пар даёт исходный текст
+    """
+    sentences = [sentence for paragraph in text.split('\n') for sentence in split(paragraph)]
+    starts, position = [], 0
+    for sentence in sentences:
+        start = text.find(sentence, position)
+        if start < 0:
+            # Делитель изменил текст предложения; split_sentences всегда даёт подстроки текста
+            return split_segments(text)
+        starts.append(start)
+        position = start + len(sentence)
+
+    if not sentences:
+        return text, []
+    ends = starts[1:] + [len(text)]
+    segments = [
+        (sentence, text[start + len(sentence):end])
+        for sentence, start, end in zip(sentences, starts, ends)
+    ]
+    return text[:starts[0]], segments
+
+
+class TranslationMemory:
+    """
+    Память переводов на SQLite с точностью до предложения. Ключ - хэш от
+    (текст предложения, исходный язык, целевой язык, версия моделей).
+
+    Число записей ограничено max_entries: при превышении удаляются записи,
+    к которым дольше всего не обращались.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        """
+        Args:
+            path: путь к файлу базы данных
+            max_entries: максимальное число хранимых предложений
+        """
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS memory ('
+            'key TEXT PRIMARY KEY, translation TEXT NOT NULL, used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS memory_used ON memory (used)')
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, frm: str, to: str, model_version: str) -> str:
+        payload = '\x1f'.join([text, frm, to, model_version])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Возвращает словарь {ключ: перевод} для найденных ключей."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self._db.execute(
+                    f'SELECT key, translation FROM memory WHERE key IN ({",".join("?" * len(part))})', part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._db.executemany('UPDATE memory SET used = ? WHERE key = ?', [(now, key) for key in found])
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Сохраняет пары (ключ, перевод)."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO memory (key, translation, used) VALUES (?, ?, ?)',
+                [(key, translation, now) for key, translation in items],
+            )
+            count = self._db.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+            if count > self.max_entries:
+                self._evict(count - int(self.max_entries * 0.9))
+            self._db.commit()
+
+    def _evict(self, count):
+        self._db.execute(
+            'DELETE FROM memory WHERE key IN (SELECT key FROM memory ORDER BY used LIMIT ?)', (count,)
+        )
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'entries': entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TranslationEngine:
+    """
+    Переводчик на argostranslate, работающий с уже установленными моделями.
+
+    Список установленных моделей определяется один раз, объекты перевода
+    кэшируются по паре языков (включая цепочку через PIVOT_LANG), а все
+    предложения списка текстов переводятся одним батчем ctranslate2.
+    """
+
+    def __init__(self, model_dir=None, pivot=PIVOT_LANG, memory=None):
+        self.model_dir = model_dir or os.environ.get(MODEL_DIR_ENV)
+        self.pivot = pivot
+        if memory is None and os.environ.get(MEMORY_PATH_ENV):
+            memory = TranslationMemory(os.environ[MEMORY_PATH_ENV])
+        self.memory = memory
+        self._lock = threading.Lock()
+        self._translations = {}
+        self._installed = None
+        if self.model_dir:
+            install_local_models(self.model_dir)
+
+    def installed_pairs(self):
+        # {(from, to): версия пакета}
+        if self._installed is None:
+            self._installed = {(p.from_code, p.to_code): p.package_version for p in package.get_installed_packages()}
+        return self._installed
+
+    def refresh(self):
+        # Сбрасывает кэши после установки новых моделей
+        with self._lock:
+            self._installed = None
+            self._translations.clear()
+            translate.get_installed_languages.cache_clear()
+
+    def has_model(self, frm, to):
+        return (frm, to) in self.installed_pairs()
+
+    def _direct(self, frm, to):
+        languages = {lang.code: lang for lang in translate.get_installed_languages()}
+        if frm not in languages or to not in languages:
+            raise RuntimeError(f"Модель {frm}→{to} не установлена")
+        translation = languages[frm].get_translation(languages[to])
+        if translation is None:
+            raise RuntimeError(f"Модель {frm}→{to} не установлена")
+        return translation
+
+    def model_version(self, frm, to):
+        # Версии всех моделей цепочки: при обновлении любой из них память не используется
+        if frm == to:
+            return ''
+        if self.has_model(frm, to):
+            pairs = [(frm, to)]
+        else:
+            pairs = [(frm, self.pivot), (self.pivot, to)]
+        installed = self.installed_pairs()
+        return ','.join(f'{a}-{b}:{installed.get((a, b), "")}' for a, b in pairs)
+
+    def chain(self, frm, to):
+        """Цепочка объектов перевода frm→to: прямая модель или через pivot."""
+        key = (frm, to)
+        with self._lock:
+            if key not in self._translations:
+                if frm == to:
+                    self._translations[key] = []
+                elif self.has_model(frm, to):
+                    self._translations[key] = [self._direct(frm, to)]
+                else:
+                    self._translations[key] = [self._direct(frm, self.pivot), self._direct(self.pivot, to)]
+            return self._translations[key]
+
+    @staticmethod
+    def _package_translation(translation):
+        # PackageTranslation под обёрткой CachedTranslation или None для других видов перевода
+        underlying = getattr(translation, 'underlying', translation)
+        if not isinstance(underlying, translate.PackageTranslation):
+            return None
+        if underlying.translator is None:
+            # Так же, как PackageTranslation.hypotheses при первом переводе
+            underlying.translator = ctranslate2.Translator(
+                str(underlying.pkg.package_path / 'model'),
+                device=settings.device,
+                inter_threads=settings.inter_threads,
+                intra_threads=settings.intra_threads,
+                compute_type=settings.compute_type,
+            )
+        return underlying
+
+    def _sentence_splitter(self, frm, to):
+        # Делитель на предложения первой модели цепочки (тот же, что у argostranslate)
+        chain = self.chain(frm, to)
+        underlying = getattr(chain[0], 'underlying', chain[0]) if chain else None
+        if not isinstance(underlying, translate.PackageTranslation):
+            return split_sentences
+        return underlying.sentencizer.split_sentences
+
+    @classmethod
+    def _translate_list(cls, translation, texts):
+        # Предложения всех текстов токенизируются и переводятся одним вызовом
+        # translate_batch; argostranslate вызывает модель на каждый абзац отдельно
+        if not texts:
+            return []
+        underlying = cls._package_translation(translation)
+        if underlying is None:
+            return [translation.translate(text) for text in texts]
+
+        pkg = underlying.pkg
+        paragraphs = [translate.ITranslation.split_into_paragraphs(text) for text in texts]
+        # Для каждого абзаца - срез его предложений в общем батче
+        tokenized, spans = [], []
+        for text_paragraphs in paragraphs:
+            for paragraph in text_paragraphs:
+                sentences = underlying.sentencizer.split_sentences(paragraph)
+                spans.append((len(tokenized), len(tokenized) + len(sentences)))
+                tokenized.extend(pkg.tokenizer.encode(sentence) for sentence in sentences)
+
+        batches = []
+        if tokenized:
+            batches = underlying.translator.translate_batch(
+                tokenized,
+                target_prefix=[[pkg.target_prefix]] * len(tokenized) if pkg.target_prefix != '' else None,
+                replace_unknowns=True,
+                max_batch_size=settings.batch_size,
+                batch_type='tokens',
+                beam_size=max(1, settings.beam_size),
+                num_hypotheses=1,
+                length_penalty=0.2,
+            )
+
+        translated = []
+        for start, end in spans:
+            value = pkg.tokenizer.decode([token for batch in batches[start:end] for token in batch.hypotheses[0]])
+            if pkg.target_prefix != '' and value.startswith(pkg.target_prefix):
+                value = value[len(pkg.target_prefix):]
+            translated.append(value[1:] if value.startswith(' ') else value)
+
+        result, position = [], 0
+        for text_paragraphs in paragraphs:
+            count = len(text_paragraphs)
+            result.append(translate.ITranslation.combine_paragraphs(translated[position:position + count]))
+            position += count
+        return result
+
+    def translate_many(self, texts, frm, to):
+        """
+        Переводит список текстов с языка frm на язык to.
+
+        Args:
+            texts: список строк (например, предложений)
+            frm: код исходного языка
+            to: код целевого языка
+
+        Returns:
+            Список переводов в том же порядке
+        """
+        texts = list(texts)
+        if self.memory is None:
+            return self._translate_chain(texts, frm, to)
+
+        # Нейросеть переводит только предложения, которых ещё нет в памяти. Текст
+        # делится так же, как при переводе без памяти, а разделители возвращаются
+        # на место, поэтому с памятью и без неё результат одинаков
+        split = self._sentence_splitter(frm, to)
+        segmented = [split_segments(text, split) for text in texts]
+        version = self.model_version(frm, to)
+        keys = {
+            sentence: self.memory.key(sentence, frm, to, version)
+            for _, segments in segmented for sentence, _ in segments
+        }
+        known = self.memory.get_many(keys.values())
+        missing = [sentence for sentence, key in keys.items() if key not in known]
+        if missing:
+            translated = self._translate_chain(missing, frm, to)
+            new = [(keys[sentence], translation) for sentence, translation in zip(missing, translated)]
+            self.memory.put_many(new)
+            known.update(new)
+        return [
+            lead + ''.join(known[keys[sentence]] + separator for sentence, separator in segments)
+            for lead, segments in segmented
+        ]
+
+    def _translate_chain(self, texts, frm, to):
+        for translation in self.chain(frm, to):
+            texts = self._translate_list(translation, texts)
+        return texts
+
+    def translate(self, text, frm, to):
+        return self.translate_many([text], frm, to)[0]
+
+
+def install_local_models(model_dir):
+    # Устанавливает модели из локальных файлов *.argosmodel, не обращаясь к сети
+    installed = {(p.from_code, p.to_code) for p in package.get_installed_packages()}
+    changed = False
+    for path in sorted(glob.glob(os.path.join(model_dir, '*.argosmodel'))):
+        # Имена файлов вида translate-ru_en-1_9.argosmodel
+        match = _model_name_re.match(os.path.basename(path))
+        if match and match.groups() in installed:
+            continue
+        package.install_from_path(path)
+        changed = True
+    if changed:
+        translate.get_installed_languages.cache_clear()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_translation_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TranslationEngine()
+        return _engine
+
+
+def setup_translation_models(target_langs=["en", "fr", "es", "de", "hi"], offline=False):
+    engine = get_translation_engine()
+
+    needed = [("ru", "en")]
+    for lang in target_langs:
+        if lang != "en":
+            needed.append(("ru", lang))
+    missing = [pair for pair in needed if not engine.has_model(*pair)]
+    # ru→X может быть заменён цепочкой ru→en→X
+    missing = [
+        (frm, to) for frm, to in missing
+        if (frm, to) == ("ru", "en") or not engine.has_model("en", to)
+    ]
+    if not missing:
+        return
+    if offline:
+        raise RuntimeError(f"Не установлены модели: {missing}")
+
+    # Индекс пакетов загружается из сети, только если чего-то не хватает
     package.update_package_index()
     available = package.get_available_packages()
-    
-    def has_model(frm, to):
-        return any(p.from_code == frm and p.to_code == to for p in available)
 
     def install_model(frm, to):
-        for inst in package.get_installed_packages():
-            if inst.from_code == frm and inst.to_code == to:
-                return
-        
         pkg = next((p for p in available if p.from_code == frm and p.to_code == to), None)
         if not pkg:
             raise RuntimeError(f"Модель {frm}→{to} не найдена")
-        
+
         path = pkg.download()
         package.install_from_path(path)
 
-    install_model("ru", "en")
-    for lang in target_langs:
-        if lang != "en":
-            if has_model("ru", lang):
-                install_model("ru", lang)
-            else:
-                install_model("en", lang)
+    for frm, to in missing:
+        if frm == "ru" and to != "en" and not any(p.from_code == frm and p.to_code == to for p in available):
+            install_model("en", to)
+        else:
+            install_model(frm, to)
+    engine.refresh()
+
+
+def translate_fanout(texts, frm, targets, engine=None, max_workers=None):
+    """
+    Переводит словарь текстов на несколько языков.
+
+    Перевод на промежуточный язык (ru→en) выполняется один раз, затем все
+    целевые языки переводятся параллельно: напрямую, если есть модель frm→X,
+    иначе - из уже готового промежуточного перевода. ctranslate2 отпускает
+    GIL во время инференса, поэтому достаточно пула потоков.
+
+    Args:
+        texts: словарь {ключ: текст} на языке frm
+        frm: код исходного языка
+        targets: коды целевых языков
+        engine: TranslationEngine (по умолчанию - общий)
+        max_workers: число потоков (по умолчанию - по одному на язык)
+
+    Returns:
+        Кортеж ({язык: {ключ: текст}}, {язык: время перевода в секундах});
+        время промежуточного перевода указывается под кодом pivot-языка
+    """
+    engine = engine or get_translation_engine()
+    keys = list(texts)
+    source = [texts[key] for key in keys]
+    targets = [lang for lang in dict.fromkeys(targets) if lang != frm]
+    pivot = engine.pivot
+    results, timings = {}, {}
+
+    def run(lang, sentences, src):
+        started = time.perf_counter()
+        translated = engine.translate_many(sentences, src, lang)
+        return lang, dict(zip(keys, translated)), time.perf_counter() - started
+
+    needs_pivot = [lang for lang in targets if lang == pivot or not engine.has_model(frm, lang)]
+    if needs_pivot:
+        _, results[pivot], timings[pivot] = run(pivot, source, frm)
+    pivot_texts = [results[pivot][key] for key in keys] if needs_pivot else None
+
+    jobs = [
+        (lang, source, frm) if engine.has_model(frm, lang) else (lang, pivot_texts, pivot)
+        for lang in targets if lang != pivot
+    ]
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max_workers or len(jobs), thread_name_prefix='translate') as pool:
+            for lang, translated, seconds in pool.map(lambda job: run(*job), jobs):
+                results[lang] = translated
+                timings[lang] = seconds
+
+    if pivot not in targets:
+        results.pop(pivot, None)
+    return results, timings
+
 
 def smart_translate(text, frm, to):
-    if has_model(frm, to):
-        return translate.translate(text, frm, to)
-    
-    mid = "en"
-    return translate.translate(
-        translate.translate(text, frm, mid),
-        mid, to
-    )
+    return get_translation_engine().translate(text, frm, to)
+
 
 def has_model(frm, to):
-    available = package.get_available_packages()
-    return any(p.from_code == frm and p.to_code == to for p in available)
\ No newline at end of file
+    return get_translation_engine().has_model(frm, to)
@@ -1,10 +1,17 @@
+import math
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
 import torch
 import torchaudio
 import numpy as np
 import wave
 from aksharamukha import transliterate
 from .chess_notation import transliterate_chess_notation
+from .cache import CACHE_DIR_ENV, SpeechCache
 
 TTS_CONFIG = {
     'en': dict(version='v3', language='en',   speaker='lj_16khz',    sample_rate=48000),
@@ -23,10 +30,161 @@ TTS_CONFIG = {
     ),
 }
 
+_sentence_re = re.compile(r'(?<=[.!?…।])\s+')
+
+
+def split_sentences(text: str):
+    # Предложение - единица синтеза и кэша: повторяющаяся фраза даёт один и тот же
+    # фрагмент (и ключ кэша) в любом тексте
+    return [sentence for sentence in _sentence_re.split(text.strip()) if sentence]
+
+
+_resamplers = {}
+_resamplers_lock = threading.Lock()
+
+
+def get_resampler(orig_freq: int, new_freq: int) -> torchaudio.transforms.Resample:
+    # Ядро фильтра строится один раз на пару частот и переиспользуется
+    key = (orig_freq, new_freq)
+    with _resamplers_lock:
+        resampler = _resamplers.get(key)
+        if resampler is None:
+            resampler = _resamplers[key] = torchaudio.transforms.Resample(orig_freq, new_freq)
+    return resampler
+
+
+def resample_many(audios, orig_freq: int, new_freq: int):
+    """
+    Ресемплирует много клипов одним вызовом: клипы дополняются нулями
+    до общей длины, обрабатываются как батч и обрезаются обратно.
+
+    Args:
+        audios: список одномерных тензоров с частотой orig_freq
+        orig_freq: исходная частота дискретизации
+        new_freq: целевая частота дискретизации
+
+    Returns:
+        Список одномерных тензоров с частотой new_freq
+    """
+    if orig_freq == new_freq or not audios:
+        return list(audios)
+
+    lengths = [audio.shape[-1] for audio in audios]
+    batch = torch.zeros(len(audios), max(lengths), dtype=audios[0].dtype)
+    for i, audio in enumerate(audios):
+        batch[i, :lengths[i]] = audio.reshape(-1)
+
+    with torch.inference_mode():
+        resampled = get_resampler(orig_freq, new_freq)(batch)
+    return [
+        resampled[i, :math.ceil(length * new_freq / orig_freq)]
+        for i, length in enumerate(lengths)
+    ]
+
+
+# Каталог с локальной копией репозитория snakers4/silero-models для работы без сети
+MODEL_DIR_ENV = 'SILERO_MODEL_DIR'
+
+
+def _available_memory_mb():
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class AudioBuffer(NamedTuple):
+    # PCM в памяти: моно float32 в диапазоне [-1, 1]
+    samples: np.ndarray
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+
 class TTSEngine:
-    def __init__(self):
+    def __init__(self, preload=None, model_dir=None, max_models=None, min_free_memory_mb=None,
+                 num_threads=4, cache=None):
         self.device = torch.device('cpu')
-        torch.set_num_threads(4)
+        torch.set_num_threads(num_threads)
+
+        self.model_dir = model_dir or os.environ.get(MODEL_DIR_ENV)
+        self.max_models = max_models
+        self.min_free_memory_mb = min_free_memory_mb
+
+        # Кэш синтезированной речи: явно переданный или из TTS_CACHE_DIR
+        if cache is None and os.environ.get(CACHE_DIR_ENV):
+            cache = SpeechCache(os.environ[CACHE_DIR_ENV])
+        self.cache = cache
+
+        # Пул загруженных моделей: lang -> (apply_fn | None, model, symbols, sr)
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+        self.synthesis_seconds = {}
+
+        for lang in preload or ():
+            self.get_model(lang)
+
+    def _hub_load(self, **kwargs):
+        if self.model_dir:
+            return torch.hub.load(repo_or_dir=self.model_dir, model='silero_tts', source='local', **kwargs)
+        return torch.hub.load(repo_or_dir='snakers4/silero-models', model='silero_tts', **kwargs)
+
+    def _load_model(self, lang):
+        cfg = TTS_CONFIG[lang]
+        if cfg.get('version') == 'v4':
+            model, _ = self._hub_load(language=cfg['language'], speaker=cfg['model_id'])
+            model.to(self.device)
+            return None, model, None, cfg['sample_rate']
+
+        res = self._hub_load(language=cfg['language'], speaker=cfg['speaker'])
+        if isinstance(res, tuple) and len(res) == 5:
+            model, symbols, sr, _, apply_fn = res
+            model.to(self.device)
+            return apply_fn, model, symbols, sr
+
+        model, _ = res
+        model.to(self.device)
+        return None, model, None, cfg['sample_rate']
+
+    def _evict(self):
+        while self.max_models is not None and len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+        if self.min_free_memory_mb is not None:
+            while len(self._models) > 1:
+                free = _available_memory_mb()
+                if free is None or free >= self.min_free_memory_mb:
+                    break
+                self._models.popitem(last=False)
+
+    def get_model(self, lang):
+        with self._lock:
+            if lang in self._models:
+                self._models.move_to_end(lang)
+                return self._models[lang]
+
+            started = time.perf_counter()
+            entry = self._load_model(lang)
+            self.load_seconds[lang] = self.load_seconds.get(lang, 0.0) + time.perf_counter() - started
+
+            self._models[lang] = entry
+            self._evict()
+            return entry
+
+    def unload(self, lang=None):
+        with self._lock:
+            if lang is None:
+                self._models.clear()
+            else:
+                self._models.pop(lang, None)
+
+    def timings(self):
+        return {
+            'load_seconds': dict(self.load_seconds),
+            'synthesis_seconds': dict(self.synthesis_seconds),
+        }
     
     def save_wav_via_wave(self, audio_tensor: torch.Tensor, sr: int, out_path: str):
         if audio_tensor.dim() == 1:
@@ -40,65 +198,158 @@ class TTSEngine:
             wf.setframerate(sr)
             wf.writeframes(data.tobytes())
 
-    def synthesize(self, text: str, lang: str, out_wav: str) -> float:
+    def _prepare_text(self, text: str, lang: str) -> str:
         cfg = TTS_CONFIG[lang]
-        
         if lang == 'ru' and cfg.get('version') == 'v4':
             text = transliterate_chess_notation(text)
+        if lang == 'hi':
+            text = transliterate.process(cfg['translit_from'], cfg['translit_to'], text)
+        return text
 
-        if cfg.get('version') == 'v4':
-            model, _ = torch.hub.load(
-                repo_or_dir='snakers4/silero-models',
-                model='silero_tts',
-                language=cfg['language'],
-                speaker=cfg['model_id']
-            )
-            model.to(self.device)
-            audio = model.apply_tts(
-                text=text,
-                speaker=cfg['apply_speaker'],
-                sample_rate=cfg['sample_rate']
-            )
-            sr_use = cfg['sample_rate']
+    def _cache_key(self, text, lang):
+        cfg = TTS_CONFIG[lang]
+        speaker = cfg.get('apply_speaker') or cfg.get('speaker')
+        model_version = f"{cfg['version']}:{cfg.get('model_id') or cfg.get('speaker')}"
+        return self.cache.key(text, lang, speaker, cfg['sample_rate'], model_version)
+
+    def _synthesize_texts(self, texts, lang):
+        # Возвращает (список аудио-тензоров, частота дискретизации)
+        texts = [self._prepare_text(text, lang) for text in texts]
+        if self.cache is None:
+            return self._run_model(texts, lang)
+
+        # Каждое предложение ищется в кэше один раз; синтезируются одним батчем
+        # только отсутствующие, повторы внутри батча - один раз
+        positions = OrderedDict()
+        for i, text in enumerate(texts):
+            positions.setdefault(self._cache_key(text, lang), []).append(i)
+
+        audios, sr_use = [None] * len(texts), None
+        missing = []
+        for key, indices in positions.items():
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(key)
+                continue
+            sr_use = cached[1]
+            for i in indices:
+                audios[i] = torch.from_numpy(cached[0])
+
+        if missing:
+            synthesized, sr_use = self._run_model([texts[positions[key][0]] for key in missing], lang)
+            for key, audio in zip(missing, synthesized):
+                for i in positions[key]:
+                    audios[i] = audio
+                self.cache.put(key, audio.detach().cpu().numpy(), sr_use)
+
+        return audios, sr_use if sr_use is not None else TTS_CONFIG[lang]['sample_rate']
+
+    def _run_model(self, texts, lang):
+        cfg = TTS_CONFIG[lang]
+        apply_fn, model, symbols, sr_use = self.get_model(lang)
+
+        started = time.perf_counter()
+        if apply_fn is not None:
+            # Старые модели silero принимают список текстов и синтезируют его батчем
+            audios = list(apply_fn(texts, model, sr_use, symbols, self.device))
+        elif cfg.get('version') == 'v4':
+            audios = [
+                model.apply_tts(text=text, speaker=cfg['apply_speaker'], sample_rate=cfg['sample_rate'])
+                for text in texts
+            ]
+        elif lang == 'hi':
+            audios = [model.apply_tts(text, speaker=cfg['apply_speaker']) for text in texts]
         else:
-            res = torch.hub.load(
-                repo_or_dir='snakers4/silero-models',
-                model='silero_tts',
-                language=cfg['language'],
-                speaker=cfg['speaker']
-            )
-            
-            if isinstance(res, tuple) and len(res) == 5:
-                model, symbols, sr, _, apply_fn = res
-                model.to(self.device)
-                audio = apply_fn([text], model, sr, symbols, self.device)[0]
-                sr_use = sr
+            audios = []
+            for text in texts:
+                audio = model.apply_tts(
+                    text,
+                    speaker=cfg['speaker'],
+                    sample_rate=cfg['sample_rate']
+                )
+                if isinstance(audio, (list, tuple)):
+                    audio = audio[0]
+                audios.append(audio)
+        self.synthesis_seconds[lang] = self.synthesis_seconds.get(lang, 0.0) + time.perf_counter() - started
+
+        return audios, sr_use
+
+    def _finish(self, audios, sr_use, out_wavs, return_audio, sample_rate=48000):
+        # Пишет WAV (и их _48k-версии) и формирует результаты; ресемплинг всех
+        # клипов выполняется одним вызовом
+        audios = [audio.reshape(-1) for audio in audios]
+        need_resampled = return_audio or any(out_wav is not None for out_wav in out_wavs)
+        resampled = audios
+        if sr_use != sample_rate and need_resampled:
+            resampled = resample_many(audios, sr_use, sample_rate)
+
+        results = []
+        for audio, audio_48k, out_wav in zip(audios, resampled, out_wavs):
+            if out_wav is not None:
+                self.save_wav_via_wave(audio, sr_use, out_wav)
+                if sr_use != sample_rate:
+                    base, ext = os.path.splitext(out_wav)
+                    self.save_wav_via_wave(audio_48k, sample_rate, f"{base}_48k{ext}")
+            if return_audio:
+                results.append(AudioBuffer(
+                    audio_48k.detach().cpu().numpy().astype(np.float32, copy=False), sample_rate
+                ))
             else:
-                model, _ = res
-                model.to(self.device)
-                if lang == 'hi':
-                    roman = transliterate.process(cfg['translit_from'], cfg['translit_to'], text)
-                    audio = model.apply_tts(roman, speaker=cfg['apply_speaker'])
-                else:
-                    audio = model.apply_tts(
-                        text,
-                        speaker=cfg['speaker'],
-                        sample_rate=cfg['sample_rate']
-                    )
-                    if isinstance(audio, (list, tuple)):
-                        audio = audio[0]
-                sr_use = cfg['sample_rate']
-
-        # Рассчитываем длительность аудио в секундах
-        duration_seconds = audio.shape[0] / sr_use
-        
-        self.save_wav_via_wave(audio, sr_use, out_wav)
-        
-        if sr_use != 48000:
-            resampler = torchaudio.transforms.Resample(sr_use, 48000)
-            audio_48k = resampler(audio.unsqueeze(0)).squeeze(0)
-            base, ext = os.path.splitext(out_wav)
-            out_48k = f"{base}_48k{ext}"
-            self.save_wav_via_wave(audio_48k, 48000, out_48k)
-        
-        return duration_seconds
\ No newline at end of file
+                # Рассчитываем длительность аудио в секундах
+                results.append(audio.shape[0] / sr_use)
+        return results
+
+    def synthesize(self, text: str, lang: str, out_wav: Optional[str] = None, return_audio: bool = False):
+        """
+        Синтезирует речь для одного текста.
+
+        Args:
+            text: Текст
+            lang: Язык из TTS_CONFIG
+            out_wav: Путь для записи WAV (None - не писать файл)
+            return_audio: Вернуть AudioBuffer (48 кГц) вместо длительности
+
+        Returns:
+            Длительность в секундах или AudioBuffer, если return_audio=True
+        """
+        # Тот же путь, что и у батча: текст режется на те же предложения, и кэш
+        # использует одни и те же ключи
+        return self.synthesize_batch([(text, lang, out_wav)], return_audio=return_audio)[0]
+
+    def synthesize_batch(self, items, return_audio=False):
+        """
+        Синтезирует много текстов за один проход: тексты группируются по языку
+        и режутся на предложения, все предложения языка синтезируются вместе
+        (батчем, если модель это поддерживает) и склеиваются обратно.
+        С кэшем каждое предложение - отдельная запись, синтезируются только промахи.
+
+        Args:
+            items: список кортежей (text, lang, out_wav); out_wav может быть None
+            return_audio: вернуть AudioBuffer (48 кГц) вместо длительностей
+
+        Returns:
+            Список длительностей (в секундах) или AudioBuffer в порядке items
+        """
+        by_lang = OrderedDict()
+        for index, (text, lang, out_wav) in enumerate(items):
+            by_lang.setdefault(lang, []).append((index, text, out_wav))
+
+        results = [None] * len(items)
+        for lang, group in by_lang.items():
+            sentences, owners = [], []
+            for position, (_, text, _) in enumerate(group):
+                for sentence in split_sentences(text):
+                    sentences.append(sentence)
+                    owners.append(position)
+
+            audios, sr_use = self._synthesize_texts(sentences, lang) if sentences else ([], 48000)
+            parts = [[] for _ in group]
+            for position, audio in zip(owners, audios):
+                parts[position].append(audio.reshape(-1))
+
+            joined = [torch.cat(pieces) if pieces else torch.zeros(0) for pieces in parts]
+            finished = self._finish(joined, sr_use, [out_wav for _, _, out_wav in group], return_audio)
+            for (index, _, _), result in zip(group, finished):
+                results[index] = result
+
+        return results
@@ -1,12 +1,37 @@
 import os
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.audio.io.AudioFileClip import AudioFileClip
-from moviepy.audio.AudioClip import CompositeAudioClip
+import numpy as np
+from moviepy import AudioFileClip, VideoFileClip
+from moviepy.audio.AudioClip import AudioArrayClip, CompositeAudioClip
+
+
+def load_audio_clip(audio):
+    """
+    Создаёт аудиоклип из пути к файлу или из PCM в памяти.
+
+    Args:
+        audio: Путь к аудиофайлу или пара (samples, sample_rate), например
+            tts.AudioBuffer; samples - моно или (n, channels) float в [-1, 1]
+
+    Returns:
+        Аудиоклип MoviePy
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        return AudioFileClip(audio)
+
+    samples, sample_rate = audio
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if samples.shape[1] == 1:
+        # Моно дублируется в стерео, как у AudioFileClip: CompositeAudioClip
+        # в MoviePy 2 неверно микширует одноканальные клипы
+        samples = np.repeat(samples, 2, axis=1)
+    return AudioArrayClip(samples, fps=sample_rate)
 
 
 def overlay_audio_on_video(
     video_path: str,
-    audio_path: str,
+    audio_path,
     start_time_seconds: float,
     output_path: str
 ) -> None:
@@ -16,7 +41,7 @@ def overlay_audio_on_video(
 
     Args:
         video_path: Путь к исходному видеофайлу
-        audio_path: Путь к аудиофайлу для наложения
+        audio_path: Путь к аудиофайлу для наложения или PCM в памяти (samples, sample_rate)
         start_time_seconds: Время начала аудио в секундах (может быть float)
         output_path: Путь для сохранения результата
 
@@ -31,7 +56,7 @@ def overlay_audio_on_video(
     try:
         # Загружаем видео и аудио
         video_clip = VideoFileClip(video_path)
-        audio_clip = AudioFileClip(audio_path)
+        audio_clip = load_audio_clip(audio_path)
 
         # Проверяем, что аудио не выходит за пределы видео
         if start_time_seconds + audio_clip.duration > video_clip.duration:
@@ -41,7 +66,7 @@ def overlay_audio_on_video(
             )
 
         # Создаем отложенное аудио
-        delayed_audio = audio_clip.set_start(start_time_seconds)
+        delayed_audio = audio_clip.with_start(start_time_seconds)
 
         # Микшируем аудио (исходное + новое)
         audio_tracks = [delayed_audio]
@@ -51,7 +76,7 @@ def overlay_audio_on_video(
         mixed_audio = CompositeAudioClip(audio_tracks)
 
         # Создаем финальный клип
-        final_clip = video_clip.set_audio(mixed_audio)
+        final_clip = video_clip.with_audio(mixed_audio)
 
         # Сохраняем результат
         try:
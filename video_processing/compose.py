@@ -0,0 +1,115 @@
+from typing import List, NamedTuple, Sequence
+
+from moviepy import VideoFileClip
+from moviepy.audio.AudioClip import CompositeAudioClip
+
+from .audio_on_video import load_audio_clip
+from .subtitles import SubtitleTrack, apply_subtitle_track, centered_rectangle, layout_subtitles
+
+
+class AudioCue(NamedTuple):
+    """Аудиофрагмент: путь к файлу или PCM (samples, sample_rate) и время начала в секундах."""
+    audio: object
+    start: float
+
+
+class SubtitleCue(NamedTuple):
+    """Субтитры, показываемые по 1-2 слова на отрезке [start, start + duration]."""
+    text: str
+    start: float
+    duration: float
+    y_position: int = 500
+    font_size: int = 40
+    font_color: str = "white"
+
+
+def compose_video(
+    video_path: str,
+    output_path: str,
+    audio_cues: Sequence[AudioCue] = (),
+    subtitle_cues: Sequence[SubtitleCue] = (),
+    workers: int = 1,
+) -> str:
+    """
+    Накладывает все аудиофрагменты и субтитры на видео за один проход:
+    исходное видео декодируется один раз и кодируется в libx264 один раз,
+    вместо отдельного перекодирования на каждый вызов
+    overlay_audio_on_video / add_centered_subtitles.
+
+    Args:
+        video_path: Путь к исходному видеофайлу
+        output_path: Путь для сохранения результата
+        audio_cues: Аудиофрагменты для наложения
+        subtitle_cues: Субтитры
+        workers: Число процессов кодирования; больше 1 - рендер по кускам (см. render_chunked)
+
+    Returns:
+        Путь к сохранённому видео
+
+    Raises:
+        ValueError: Если аудиофрагмент начинается раньше 0 или выходит за пределы видео
+    """
+    if workers > 1:
+        from .render import render_chunked
+        return render_chunked(video_path, output_path, audio_cues, subtitle_cues, workers=workers)
+
+    video_clip = VideoFileClip(video_path)
+    audio_clips = []
+    try:
+        audio_clips = load_audio_cues(audio_cues, video_clip.duration)
+        final_clip = overlay_subtitle_cues(video_clip, subtitle_cues)
+        mixed_audio = mix_audio(video_clip, audio_cues, audio_clips)
+        if mixed_audio is not None:
+            final_clip = final_clip.with_audio(mixed_audio)
+
+        final_clip.write_videofile(
+            output_path,
+            codec="libx264",
+            audio_codec="aac",
+            ffmpeg_params=["-movflags", "+faststart"]
+        )
+        return output_path
+    finally:
+        video_clip.close()
+        for clip in audio_clips:
+            clip.close()
+
+
+def load_audio_cues(audio_cues: Sequence[AudioCue], video_duration: float) -> List:
+    """Загружает аудиофрагменты и проверяет, что они помещаются в видео."""
+    audio_clips = []
+    try:
+        for cue in audio_cues:
+            if cue.start < 0:
+                raise ValueError("Время начала не может быть отрицательным")
+            clip = load_audio_clip(cue.audio)
+            audio_clips.append(clip)
+            if cue.start + clip.duration > video_duration:
+                raise ValueError(
+                    f"Аудио выходит за пределы видео. Длительность видео: {video_duration} сек, "
+                    f"а аудио заканчивается на {cue.start + clip.duration} сек"
+                )
+    except Exception:
+        for clip in audio_clips:
+            clip.close()
+        raise
+    return audio_clips
+
+
+def mix_audio(video_clip, audio_cues: Sequence[AudioCue], audio_clips: List):
+    """Микширует исходную дорожку со всеми фрагментами; None, если звука нет."""
+    audio_tracks = [clip.with_start(cue.start) for cue, clip in zip(audio_cues, audio_clips)]
+    if video_clip.audio:
+        audio_tracks.insert(0, video_clip.audio)
+    return CompositeAudioClip(audio_tracks) if audio_tracks else None
+
+
+def overlay_subtitle_cues(video_clip, subtitle_cues: Sequence[SubtitleCue]):
+    """Возвращает клип с наложенными субтитрами (или исходный, если их нет)."""
+    track = SubtitleTrack()
+    for cue in subtitle_cues:
+        rectangle = centered_rectangle(video_clip.size, cue.y_position, cue.font_size)
+        track.extend(layout_subtitles(
+            cue.text, cue.start, rectangle, cue.duration, cue.font_size, cue.font_color
+        ))
+    return apply_subtitle_track(video_clip, track)
@@ -0,0 +1,184 @@
+import json
+import os
+import subprocess
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Пути к бинарникам можно переопределить так же, как в MoviePy
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.environ.get("FFPROBE_BINARY", "ffprobe")
+
+
+class VideoInfo(NamedTuple):
+    """Параметры видеопотока, которые должны совпадать у склеиваемых кусков."""
+    codec: str
+    width: int
+    height: int
+    pix_fmt: str
+    fps: str
+    duration: float
+    profile: str = ""
+    level: int = 0
+    sample_aspect_ratio: str = ""
+    refs: int = 0
+
+
+# Профили H.264 в записи ffprobe -> значения -profile:v для libx264
+X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+
+
+def run_ffmpeg(args: Sequence[str]) -> None:
+    """
+    Запускает ffmpeg без интерактивного вывода.
+
+    Raises:
+        RuntimeError: Если ffmpeg завершился с ошибкой
+    """
+    result = subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg завершился с ошибкой: {result.stderr.strip()}")
+
+
+def _probe(args: Sequence[str]) -> str:
+    result = subprocess.run([FFPROBE_BINARY, "-v", "error", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe завершился с ошибкой: {result.stderr.strip()}")
+    return result.stdout
+
+
+def probe_video(video_path: str) -> VideoInfo:
+    """Возвращает параметры первого видеопотока файла."""
+    data = json.loads(_probe([
+        "-select_streams", "v:0",
+        "-show_entries",
+        "stream=codec_name,width,height,pix_fmt,avg_frame_rate,profile,level,sample_aspect_ratio,refs"
+        ":format=duration",
+        "-of", "json", video_path,
+    ]))
+    stream = data["streams"][0]
+    return VideoInfo(
+        codec=stream["codec_name"],
+        width=int(stream["width"]),
+        height=int(stream["height"]),
+        pix_fmt=stream.get("pix_fmt", "yuv420p"),
+        fps=stream["avg_frame_rate"],
+        duration=float(data["format"]["duration"]),
+        profile=stream.get("profile", ""),
+        level=int(stream.get("level", 0)),
+        sample_aspect_ratio=stream.get("sample_aspect_ratio", ""),
+        refs=int(stream.get("refs", 0)),
+    )
+
+
+def x264_stream_args(info: VideoInfo) -> Optional[List[str]]:
+    """
+    Параметры libx264, при которых перекодированный кусок совпадает с исходным
+    потоком H.264 по профилю, уровню, числу опорных кадров и SAR.
+
+    Returns:
+        Список аргументов ffmpeg или None, если профиль исходника
+        нельзя воспроизвести средствами libx264
+    """
+    profile = X264_PROFILES.get(info.profile)
+    if info.codec != "h264" or profile is None:
+        return None
+
+    args = ["-profile:v", profile]
+    if info.level == 9:
+        args += ["-level", "1b"]
+    elif info.level > 0:
+        args += ["-level", f"{info.level // 10}.{info.level % 10}"]
+    if info.refs > 0:
+        args += ["-x264-params", f"ref={info.refs}"]
+    if info.sample_aspect_ratio not in ("", "N/A", "0:1"):
+        args += ["-vf", f"setsar={info.sample_aspect_ratio.replace(':', '/')}"]
+    return args
+
+
+def probe_keyframes(video_path: str) -> np.ndarray:
+    """
+    Возвращает отсортированные времена ключевых кадров (в секундах).
+
+    Читаются только заголовки пакетов, без декодирования кадров.
+    """
+    output = _probe([
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0", video_path,
+    ])
+    times = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return np.unique(np.array(times, dtype=np.float64))
+
+
+def copy_segment(video_path: str, start: float, end: float, output_path: str) -> None:
+    """Копирует отрезок [start, end) без перекодирования; start должен быть ключевым кадром."""
+    run_ffmpeg([
+        "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}",
+        "-map", "0:v:0", "-an", "-c", "copy",
+        "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", output_path,
+    ])
+
+
+def encode_segment(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    info: VideoInfo,
+    preset: str = "veryfast",
+    crf: int = 18,
+    threads: int = 0,
+) -> None:
+    """
+    Перекодирует отрезок [start, end) в H.264 с параметрами исходного потока
+    (формат пикселей, частота кадров, профиль, уровень, опорные кадры, SAR),
+    чтобы результат можно было склеить с кусками, скопированными без перекодирования.
+    """
+    run_ffmpeg([
+        "-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}",
+        "-map", "0:v:0", "-an",
+        "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-threads", str(threads),
+        "-pix_fmt", info.pix_fmt, "-r", info.fps, *(x264_stream_args(info) or []),
+        "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", output_path,
+    ])
+
+
+def concat_copy(segment_paths: List[str], output_path: str, audio_path: str = None) -> None:
+    """
+    Склеивает куски через concat demuxer без перекодирования.
+
+    Args:
+        segment_paths: пути к кускам в порядке склейки
+        output_path: путь к результату
+        audio_path: готовая звуковая дорожка, добавляемая без перекодирования
+    """
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        inputs = ["-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            inputs += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+        run_ffmpeg([*inputs, "-c", "copy", "-movflags", "+faststart", output_path])
+    finally:
+        os.remove(list_path)
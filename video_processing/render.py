@@ -0,0 +1,133 @@
+import multiprocessing as mp
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from moviepy import VideoFileClip
+
+from .compose import AudioCue, SubtitleCue, load_audio_cues, mix_audio, overlay_subtitle_cues
+from .ffmpeg import concat_copy, probe_keyframes, probe_video
+
+# Куски короче этого не выделяются: накладные расходы на запуск ffmpeg превысят выигрыш
+MIN_CHUNK_SECONDS = 2.0
+
+
+def plan_chunks(duration: float, fps: float, keyframes: np.ndarray, num_chunks: int) -> List[Tuple[float, float]]:
+    """
+    Делит [0, duration) на примерно равные куски. Границы сдвигаются к ближайшим
+    ключевым кадрам исходника (чтобы каждый процесс начинал декодирование
+    без лишней перемотки) и выравниваются по сетке кадров, чтобы при склейке
+    не терялись и не дублировались кадры.
+
+    Args:
+        duration: длительность видео в секундах
+        fps: частота кадров
+        keyframes: времена ключевых кадров исходника
+        num_chunks: желаемое число кусков
+
+    Returns:
+        Список полуинтервалов (start, end)
+    """
+    num_chunks = max(1, min(num_chunks, int(duration // MIN_CHUNK_SECONDS) or 1))
+    step = duration / num_chunks
+    bounds = [0.0]
+    for i in range(1, num_chunks):
+        target = i * step
+        if len(keyframes):
+            nearest = keyframes[np.argmin(np.abs(keyframes - target))]
+            if abs(nearest - target) <= step / 4:
+                target = float(nearest)
+        target = round(target * fps) / fps
+        if target - bounds[-1] >= MIN_CHUNK_SECONDS and duration - target >= MIN_CHUNK_SECONDS:
+            bounds.append(target)
+    bounds.append(duration)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _render_chunk(video_path, subtitle_cues, start, end, output_path, preset, crf, threads):
+    video_clip = VideoFileClip(video_path, audio=False)
+    try:
+        clip = overlay_subtitle_cues(video_clip, subtitle_cues).subclipped(start, end)
+        clip.write_videofile(
+            output_path,
+            codec="libx264",
+            audio=False,
+            preset=preset,
+            threads=threads,
+            ffmpeg_params=["-crf", str(crf), "-pix_fmt", "yuv420p"],
+            logger=None
+        )
+    finally:
+        video_clip.close()
+    return output_path
+
+
+def render_chunked(
+    video_path: str,
+    output_path: str,
+    audio_cues: Sequence[AudioCue] = (),
+    subtitle_cues: Sequence[SubtitleCue] = (),
+    workers: int = None,
+    preset: str = "veryfast",
+    crf: int = 20,
+    tmp_dir: str = None,
+) -> str:
+    """
+    Рендерит композицию (как compose_video) параллельно: видео делится на куски
+    по ключевым кадрам, каждый кусок кодируется libx264 в отдельном процессе
+    со своим бюджетом потоков, звук микшируется один раз, а куски склеиваются
+    concat demuxer'ом без перекодирования.
+
+    Args:
+        video_path: Путь к исходному видеофайлу
+        output_path: Путь для сохранения результата
+        audio_cues: Аудиофрагменты для наложения
+        subtitle_cues: Субтитры
+        workers: Число процессов (по умолчанию - число доступных ядер)
+        preset: Пресет libx264
+        crf: Качество libx264 (меньше - лучше)
+        tmp_dir: Каталог для временных кусков (по умолчанию - системный)
+
+    Returns:
+        Путь к сохранённому видео
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    workers = workers or cpus
+    info = probe_video(video_path)
+    fps = float(Fraction(info.fps))
+    chunks = plan_chunks(info.duration, fps, probe_keyframes(video_path), workers)
+    threads = max(1, cpus // len(chunks))
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as workdir:
+        paths = [os.path.join(workdir, f"chunk_{i:04d}.mp4") for i in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=mp.get_context('spawn')) as pool:
+            futures = [
+                pool.submit(_render_chunk, video_path, list(subtitle_cues), start, end, path, preset, crf, threads)
+                for (start, end), path in zip(chunks, paths)
+            ]
+
+            # Пока кодируется видео, звук микшируется в основном процессе
+            audio_path = None
+            video_clip = VideoFileClip(video_path)
+            audio_clips = []
+            try:
+                audio_clips = load_audio_cues(audio_cues, video_clip.duration)
+                mixed_audio = mix_audio(video_clip, audio_cues, audio_clips)
+                if mixed_audio is not None:
+                    audio_path = os.path.join(workdir, "audio.m4a")
+                    mixed_audio.with_duration(video_clip.duration).write_audiofile(
+                        audio_path, fps=44100, codec="aac", logger=None
+                    )
+            finally:
+                video_clip.close()
+                for clip in audio_clips:
+                    clip.close()
+
+            for future in futures:
+                future.result()
+
+        concat_copy(paths, output_path, audio_path)
+    return output_path
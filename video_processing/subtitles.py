@@ -1,10 +1,13 @@
 import os
 import textwrap
-from typing import Tuple, List
+from bisect import bisect_right
+from typing import Tuple, List, NamedTuple
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from moviepy import VideoFileClip, ImageClip, CompositeVideoClip
 
+from .text_atlas import DEFAULT_FONT, TextBitmap, blit, centered_position, get_font, render_text
+
 def create_text_frame(text, size, font_size=30, font_color="white", bg_color=None):
     """Create a frame with text using PIL instead of TextClip"""
     width, height = size
@@ -12,11 +15,8 @@ def create_text_frame(text, size, font_size=30, font_color="white", bg_color=Non
     img = Image.new('RGBA', size, color=(0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
-    # Use a default font
-    try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except IOError:
-        font = ImageFont.load_default()
+    # Fonts are loaded once per (face, size)
+    font = get_font(DEFAULT_FONT, font_size)
     
     # Draw the text centered - use getbbox instead of textsize which is deprecated
     bbox = draw.textbbox((0, 0), text, font=font)
@@ -109,58 +109,71 @@ def add_subtitles(
     return output_path
 
 
-def add_subtitles_word_by_word(
-    video_path: str,
+def split_into_chunks(text: str) -> List[str]:
+    """Split text into chunks of 1-2 words (long words are shown alone)."""
+    words = text.split()
+    
+    chunks = []
+    i = 0
+    while i < len(words):
+        # If we have only one word left or the current word is long, use just one word
+        if i == len(words) - 1 or len(words[i]) >= 10:
+            chunks.append(words[i])
+            i += 1
+        # Otherwise, use two words
+        else:
+            chunks.append(f"{words[i]} {words[i+1]}")
+            i += 2
+    return chunks
+
+
+def centered_rectangle(video_size: Tuple[int, int], y_position: int, font_size: int):
+    """Rectangle centered horizontally with 80% of video width, starting at y_position."""
+    video_width, _ = video_size
+    rect_width = int(video_width * 0.8)
+    x1 = (video_width - rect_width) // 2  # Center horizontally
+    return (x1, y_position), (x1 + rect_width, y_position + font_size * 2)
+
+
+class PlacedText(NamedTuple):
+    """A cached text bitmap with its on-screen position and time interval [start, end)."""
+    start: float
+    end: float
+    bitmap: TextBitmap
+    x: int
+    y: int
+
+
+def layout_subtitles(
     text: str,
     start_time: float,
     rectangle: Tuple[Tuple[int, int], Tuple[int, int]],
     duration: float,
     font_size: int = 30,
-    font_color: str = "white",
-    output_path: str = None
-) -> str:
+    font_color: str = "white"
+) -> List[PlacedText]:
     """
-    Add subtitles to a video, gradually displaying one or two words at a time.
+    Split the text into 1-2 word chunks and place each one in time and space.
     
     Args:
-        video_path: Path to the video file
         text: Subtitle text to display
         start_time: Time in seconds when subtitles should start
         rectangle: ((x1, y1), (x2, y2)) - Top left and bottom right points of the rectangle
         duration: Duration in seconds for the entire text to be displayed
         font_size: Font size
         font_color: Font color
-        output_path: Path for the output video. If None, will use original filename + "_subtitled"
     
     Returns:
-        Path to the output video file
+        List of PlacedText in display order
     """
-    # Load the video
-    video = VideoFileClip(video_path)
-    
     # Calculate rectangle dimensions
     (x1, y1), (x2, y2) = rectangle
     rect_width = x2 - x1
     rect_height = y2 - y1
     
-    # Split text into words
-    words = text.split()
-    
-    # Group words into chunks of 1-2 words
-    chunks = []
-    i = 0
-    while i < len(words):
-        # If we have only one word left or the current word is long, use just one word
-        if i == len(words) - 1 or len(words[i]) >= 10:
-            chunks.append(words[i])
-            i += 1
-        # Otherwise, use two words
-        else:
-            chunks.append(f"{words[i]} {words[i+1]}")
-            i += 2
-    
-    # Create a list of subtitle clips
-    subtitle_clips = []
+    chunks = split_into_chunks(text)
+    if not chunks:
+        return []
     
     # Calculate time per chunk
     time_per_chunk = duration / len(chunks)
@@ -168,25 +181,145 @@ def add_subtitles_word_by_word(
     # Fixed position for all subtitles (centered in the rectangle)
     position_y = y1 + (rect_height // 2) - font_size
     
-    # Create a clip for each chunk
+    placed = []
     for i, chunk in enumerate(chunks):
         chunk_start_time = start_time + (i * time_per_chunk)
         
-        # Create subtitle image with PIL
-        text_img = create_text_frame(chunk, (rect_width, font_size * 2), 
-                                    font_size=font_size, 
-                                    font_color=font_color)
+        # Cached bitmap cropped to the text, so its size depends only on the text
+        bitmap = render_text(chunk, DEFAULT_FONT, font_size, font_color)
+        x, y = centered_position(bitmap, x1, position_y, rect_width, font_size * 2)
+        placed.append(PlacedText(chunk_start_time, chunk_start_time + time_per_chunk, bitmap, x, y))
+    
+    return placed
+
+
+def make_subtitle_clips(
+    text: str,
+    start_time: float,
+    rectangle: Tuple[Tuple[int, int], Tuple[int, int]],
+    duration: float,
+    font_size: int = 30,
+    font_color: str = "white"
+) -> List[ImageClip]:
+    """
+    Create subtitle clips that display the text one or two words at a time.
+    
+    Args:
+        text: Subtitle text to display
+        start_time: Time in seconds when subtitles should start
+        rectangle: ((x1, y1), (x2, y2)) - Top left and bottom right points of the rectangle
+        duration: Duration in seconds for the entire text to be displayed
+        font_size: Font size
+        font_color: Font color
+    
+    Returns:
+        List of positioned and timed ImageClip objects
+    """
+    return [
+        ImageClip(item.bitmap.rgba, transparent=True)
+        .with_position((item.x, item.y))
+        .with_start(item.start)
+        .with_duration(item.end - item.start)
+        for item in layout_subtitles(text, start_time, rectangle, duration, font_size, font_color)
+    ]
+
+
+class SubtitleTrack:
+    """
+    Subtitle overlay applied as a per-frame filter instead of CompositeVideoClip.
+    
+    Cues are kept sorted by start time, the active cue for a frame is found
+    with bisect in O(log n), and only the text's bounding box is alpha-blended.
+    If cues overlap, the one that starts later is shown.
+    """
+    
+    def __init__(self, items: List[PlacedText] = ()):
+        self.items: List[PlacedText] = []
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.extend(items)
+    
+    def extend(self, items: List[PlacedText]):
+        self.items = sorted(list(self.items) + [item for item in items if item.end > item.start],
+                            key=lambda item: item.start)
+        self.starts = [item.start for item in self.items]
+        # An earlier cue is cut off where the next one starts
+        self.ends = [
+            min(item.end, self.starts[i + 1]) if i + 1 < len(self.items) else item.end
+            for i, item in enumerate(self.items)
+        ]
+    
+    def active(self, t: float):
+        """Return the cue shown at time t, or None."""
+        index = bisect_right(self.starts, t) - 1
+        if index >= 0 and t < self.ends[index]:
+            return self.items[index]
+        return None
+    
+    def apply(self, frame: np.ndarray, t: float, in_place: bool = True) -> np.ndarray:
+        """
+        Draw the cue active at time t into the frame.
         
-        # Convert to MoviePy clip with transparency
-        txt_clip = (ImageClip(text_img, transparent=True)
-                   .set_position((x1, position_y))
-                   .set_start(chunk_start_time)
-                   .set_duration(time_per_chunk))
-                   
-        subtitle_clips.append(txt_clip)
+        Writable uint8 frames are blended in place, so only the text's bounding
+        box is touched. Read-only frames (the ffmpeg reader returns views of its
+        read buffer) and frames with in_place=False are copied first.
+        """
+        item = self.active(t)
+        if item is None:
+            return frame
+        if not (in_place and frame.flags.writeable and frame.dtype == np.uint8):
+            frame = np.array(frame, dtype=np.uint8)
+        return blit(frame, item.bitmap, item.x, item.y)
+    
+    def filter(self, get_frame, t):
+        return self.apply(get_frame(t), t)
+    
+    def copy_filter(self, get_frame, t):
+        return self.apply(get_frame(t), t, in_place=False)
+
+
+def apply_subtitle_track(clip, track: SubtitleTrack):
+    """Return the clip with the subtitle track drawn into its frames."""
+    if not track.items:
+        return clip
+    # An ImageClip returns its own image for every frame, so it must not be blended in place
+    if isinstance(clip, ImageClip):
+        return clip.transform(track.copy_filter)
+    return clip.transform(track.filter)
+
+
+def add_subtitles_word_by_word(
+    video_path: str,
+    text: str,
+    start_time: float,
+    rectangle: Tuple[Tuple[int, int], Tuple[int, int]],
+    duration: float,
+    font_size: int = 30,
+    font_color: str = "white",
+    output_path: str = None
+) -> str:
+    """
+    Add subtitles to a video, gradually displaying one or two words at a time.
     
-    # Overlay all subtitle clips on the video
-    final_video = CompositeVideoClip([video] + subtitle_clips)
+    Args:
+        video_path: Path to the video file
+        text: Subtitle text to display
+        start_time: Time in seconds when subtitles should start
+        rectangle: ((x1, y1), (x2, y2)) - Top left and bottom right points of the rectangle
+        duration: Duration in seconds for the entire text to be displayed
+        font_size: Font size
+        font_color: Font color
+        output_path: Path for the output video. If None, will use original filename + "_subtitled"
+    
+    Returns:
+        Path to the output video file
+    """
+    # Load the video
+    video = VideoFileClip(video_path)
+    
+    # Draw subtitles into the frames with a filter instead of compositing clips
+    track = SubtitleTrack(layout_subtitles(text, start_time, rectangle, duration, font_size, font_color))
+    final_video = apply_subtitle_track(video, track)
     
     # Set output path
     if output_path is None:
@@ -226,19 +359,10 @@ def add_centered_subtitles(
     """
     # Load the video to get dimensions
     video = VideoFileClip(video_path)
-    video_width, video_height = video.size
     
     # Calculate the rectangle that's 80% of video width and centered
-    rect_width = int(video_width * 0.8)
-    x1 = (video_width - rect_width) // 2  # Center horizontally
-    x2 = x1 + rect_width
-    
-    # Use the specified y_position and add enough height for text
-    y1 = y_position
-    y2 = y_position + font_size * 2
-    
-    # Create rectangle coordinates
-    rectangle = ((x1, y1), (x2, y2))
+    rectangle = centered_rectangle(video.size, y_position, font_size)
+    video.close()
     
     # Use the existing function with our calculated rectangle
     return add_subtitles_word_by_word(
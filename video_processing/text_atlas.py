@@ -0,0 +1,87 @@
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+DEFAULT_FONT = "arial.ttf"
+
+
+class TextBitmap(NamedTuple):
+    """
+    Rendered text cropped to the glyph bounds.
+
+    rgba is the (h, w, 4) image; alpha and premultiplied are the (h, w, 1) and
+    (h, w, 3) float32 arrays precomputed for blending; left, top are the offset
+    of the cropped image from the point the text is drawn at; text_size is the
+    textbbox size used for centering, as in create_text_frame.
+    """
+    rgba: np.ndarray
+    alpha: np.ndarray
+    premultiplied: np.ndarray
+    left: int
+    top: int
+    text_size: Tuple[int, int]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.rgba.shape[1], self.rgba.shape[0]
+
+
+@lru_cache(maxsize=64)
+def get_font(face: str = DEFAULT_FONT, size: int = 30):
+    """Load a font once per (face, size)."""
+    try:
+        return ImageFont.truetype(face, size)
+    except IOError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4096)
+def render_text(text: str, face: str = DEFAULT_FONT, size: int = 30, color: str = "white") -> TextBitmap:
+    """
+    Render text, cached by (text, face, size, color).
+    The image is cropped to the glyph bounds, so its size depends only on
+    the text and not on the frame width or the subtitle area.
+    """
+    font = get_font(face, size)
+    left, top, right, bottom = font.getbbox(text)
+    width, height = max(1, right - left), max(1, bottom - top)
+
+    img = Image.new('RGBA', (width, height), color=(0, 0, 0, 0))
+    ImageDraw.Draw(img).text((-left, -top), text, font=font, fill=ImageColor.getrgb(color))
+    rgba = np.array(img)
+
+    alpha = rgba[..., 3:4].astype(np.float32) / 255
+    premultiplied = rgba[..., :3].astype(np.float32) * alpha
+    for array in (rgba, alpha, premultiplied):
+        array.flags.writeable = False
+    return TextBitmap(rgba, alpha, premultiplied, left, top, (right - left, bottom - top))
+
+
+def centered_position(bitmap: TextBitmap, box_x: int, box_y: int, box_width: int, box_height: int) -> Tuple[int, int]:
+    """Top-left corner of the cropped text centered in the rectangle."""
+    text_width, text_height = bitmap.text_size
+    return (
+        box_x + (box_width - text_width) // 2 + bitmap.left,
+        box_y + (box_height - text_height) // 2 + bitmap.top,
+    )
+
+
+def blit(frame: np.ndarray, bitmap: TextBitmap, x: int, y: int) -> np.ndarray:
+    """
+    Blend text into an (h, w, 3) uint8 frame in place, touching only the
+    pixels inside the text bounds. Parts outside the frame are clipped.
+    """
+    frame_height, frame_width = frame.shape[:2]
+    width, height = bitmap.size
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, frame_width), min(y + height, frame_height)
+    if x0 >= x1 or y0 >= y1:
+        return frame
+
+    alpha = bitmap.alpha[y0 - y:y1 - y, x0 - x:x1 - x]
+    premultiplied = bitmap.premultiplied[y0 - y:y1 - y, x0 - x:x1 - x]
+    region = frame[y0:y1, x0:x1]
+    region[...] = (region * (1 - alpha) + premultiplied + 0.5).astype(np.uint8)
+    return frame